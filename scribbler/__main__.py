@@ -1,15 +1,12 @@
-#/usr/bin/env python3
+#!/usr/bin/env python3
 """Scribbler, the default Little Scribe compiler."""
 
-# I was going to start work on this but then I realized I actually
-# hadn't though about the interface.
-
-import argparse
 import sys
 
+from driver import (
+    main,
+    )
 
-argparser = argparse.ArgumentParser(
-    description='Scribbler, the default Little Scribe compiler.')
 
-if 1 == len(sys.argv):
-    pass
+if __name__ == '__main__':
+    sys.exit(main())
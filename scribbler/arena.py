@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Flat storage for the Sentences of a whole page.
+
+A SentenceArena keeps every Sentence added to it in a few parallel arrays
+instead of a tree of Python objects. Tokens are stored once per distinct
+token and referred to by index. SentenceViews give the Sentence interface
+over the arrays, so the rest of Scribbler can use them in place of
+Sentences."""
+
+
+from array import (
+    array,
+    )
+
+from sentence import (
+    Sentence,
+    )
+from tokenization import (
+    PeriodToken,
+    Token,
+    ValueToken,
+    )
+
+
+KIND_TOKEN = 0
+KIND_SENTENCE = 1
+
+
+class SentenceArena:
+    """Parallel array storage for Sentences.
+
+    Children of every sentence are stored next to each other in the child
+    arrays, each sentence records the range of its children.
+
+    :ivar tokens: List of distinct Tokens, indexed by the token children.
+    :ivar _child_kinds: For each child, KIND_TOKEN or KIND_SENTENCE.
+    :ivar _child_values: For each child, index into tokens or of a sentence.
+    :ivar _starts: For each sentence, index of its first child.
+    :ivar _ends: For each sentence, index past its last child.
+    :ivar _dots: For each sentence, 1 if it ends with a dot, 0 otherwise."""
+
+    def __init__(self):
+        self.tokens = []
+        self._token_ids = {}
+        self._child_kinds = array('B')
+        self._child_values = array('l')
+        self._starts = array('l')
+        self._ends = array('l')
+        self._dots = array('B')
+
+    def __len__(self):
+        """Number of sentences stored in the arena."""
+        return len(self._starts)
+
+    def _add_token(self, token):
+        key = (type(token), token.text)
+        index = self._token_ids.get(key)
+        if index is None:
+            index = len(self.tokens)
+            self.tokens.append(token)
+            self._token_ids[key] = index
+        return index
+
+    def _add_sentence(self, sentence):
+        """Store a Sentence and its sub-sentences, return its index."""
+        if isinstance(sentence, SentenceView) and sentence._arena is self:
+            return sentence._index
+        children = []
+        for child in sentence:
+            if isinstance(child, Token):
+                children.append((KIND_TOKEN, self._add_token(child)))
+            else:
+                children.append((KIND_SENTENCE, self._add_sentence(child)))
+        start = len(self._child_kinds)
+        for (kind, value) in children:
+            self._child_kinds.append(kind)
+            self._child_values.append(value)
+        if not children:
+            ends_with_dot = False
+        elif KIND_TOKEN == children[-1][0]:
+            ends_with_dot = isinstance(self.tokens[children[-1][1]],
+                                       PeriodToken)
+        else:
+            ends_with_dot = bool(self._dots[children[-1][1]])
+        index = len(self._starts)
+        self._starts.append(start)
+        self._ends.append(start + len(children))
+        self._dots.append(ends_with_dot)
+        return index
+
+    def add(self, sentence):
+        """Copy a Sentence into the arena.
+
+        :return: A SentenceView of the stored copy."""
+        return SentenceView(self, self._add_sentence(sentence))
+
+    def view(self, index):
+        """Get a SentenceView of the sentence at index."""
+        if not 0 <= index < len(self._starts):
+            raise IndexError('SentenceArena.view: index out of range.')
+        return SentenceView(self, index)
+
+    def _child(self, child_index):
+        if KIND_TOKEN == self._child_kinds[child_index]:
+            return self.tokens[self._child_values[child_index]]
+        return SentenceView(self, self._child_values[child_index])
+
+
+class SentenceView(Sentence):
+    """A Sentence stored in a SentenceArena.
+
+    Views are read only and are created on demand, two views of the same
+    sentence are equal but not identical."""
+
+    def __init__(self, arena, index):
+        self._arena = arena
+        self._index = index
+        self._hash = None
+
+    @property
+    def _children(self):
+        return list(self)
+
+    def __getitem__(self, index):
+        arena = self._arena
+        start = arena._starts[self._index]
+        end = arena._ends[self._index]
+        if isinstance(index, slice):
+            return [arena._child(i) for i in range(start, end)[index]]
+        if index < 0:
+            index += end - start
+        if not 0 <= index < end - start:
+            raise IndexError('SentenceView index out of range.')
+        return arena._child(start + index)
+
+    def __len__(self):
+        arena = self._arena
+        return arena._ends[self._index] - arena._starts[self._index]
+
+    def __iter__(self):
+        arena = self._arena
+        for i in range(arena._starts[self._index], arena._ends[self._index]):
+            yield arena._child(i)
+
+    def __eq__(self, other):
+        if (isinstance(other, SentenceView) and other._arena is self._arena
+                and other._index == self._index):
+            return True
+        return super(SentenceView, self).__eq__(other)
+
+    __hash__ = Sentence.__hash__
+
+    def __repr__(self):
+        return 'SentenceView({})'.format(self._index)
+
+    def append(self, child):
+        raise TypeError('SentenceView is read only.')
+
+    def iter_sub(self):
+        """Iterate through the subsentences in this sentence."""
+        arena = self._arena
+        for i in range(arena._starts[self._index], arena._ends[self._index]):
+            if KIND_SENTENCE == arena._child_kinds[i]:
+                yield SentenceView(arena, arena._child_values[i])
+
+    def ends_with_dot(self):
+        return bool(self._arena._dots[self._index])
+
+    def is_primitive(self):
+        return (1 == len(self) and isinstance(self[0], ValueToken))
+
+    def get_value(self):
+        if not self.is_primitive():
+            raise ValueError(
+                'SentenceView.get_value: requires primitive Sentence.')
+        return self[0].get_value()
+
+    def to_sentence(self):
+        """Copy the view out into a stand alone Sentence."""
+        return Sentence(child if isinstance(child, Token)
+                        else child.to_sentence() for child in self)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Arithmetic built-ins.
+
+These are direct-call Definitions, evaluate calls their code with only the
+evaluated arguments and no scope. Integers are Python integers, so they do
+not overflow, unless a fixed width is given to arithmetic_definitions."""
+
+
+import operator
+
+from base_types import (
+    BooleanType,
+    FunctionType,
+    IntegerType,
+    )
+from errors import (
+    LSRunningError,
+    )
+from scope import (
+    Definition,
+    )
+from sentence import (
+    thaw_sentence,
+    )
+
+
+def _divide(left, right):
+    if 0 == right:
+        raise LSRunningError('Divide by zero.')
+    return left // right
+
+
+def _remainder(left, right):
+    if 0 == right:
+        raise LSRunningError('Divide by zero.')
+    return left % right
+
+
+_LEFT = ('Left', 'hand', 'side', '.')
+_RIGHT = ('Right', 'hand', 'side', '.')
+
+INTEGER_RESULT = 'integer'
+BOOLEAN_RESULT = 'boolean'
+
+# (Frozen signature, operation, result kind) for each built-in.
+OPERATIONS = [
+    # Add Left hand side. to Right hand side. .
+    (('Add', _LEFT, 'to', _RIGHT, '.'), operator.add, INTEGER_RESULT),
+    # Minus Left hand side. by Right hand side. .
+    (('Minus', _LEFT, 'by', _RIGHT, '.'), operator.sub, INTEGER_RESULT),
+    # Multiply Left hand side. by Right hand side. .
+    (('Multiply', _LEFT, 'by', _RIGHT, '.'), operator.mul, INTEGER_RESULT),
+    # Divide Left hand side. by Right hand side. .
+    (('Divide', _LEFT, 'by', _RIGHT, '.'), _divide, INTEGER_RESULT),
+    # Remainder of Left hand side. by Right hand side. .
+    (('Remainder', 'of', _LEFT, 'by', _RIGHT, '.'), _remainder,
+     INTEGER_RESULT),
+    # Is Left hand side. equal to Right hand side. .
+    (('Is', _LEFT, 'equal', 'to', _RIGHT, '.'), operator.eq,
+     BOOLEAN_RESULT),
+    # Is Left hand side. less than Right hand side. .
+    (('Is', _LEFT, 'less', 'than', _RIGHT, '.'), operator.lt,
+     BOOLEAN_RESULT),
+    # Is Left hand side. greater than Right hand side. .
+    (('Is', _LEFT, 'greater', 'than', _RIGHT, '.'), operator.gt,
+     BOOLEAN_RESULT),
+    ]
+
+
+def wrap_integer(value, width):
+    """Wrap an integer to a signed (two's complement) integer of width bits."""
+    half = 1 << (width - 1)
+    return ((value + half) & ((1 << width) - 1)) - half
+
+
+def _fixed_width(operation, width):
+    def wrapped(left, right):
+        return wrap_integer(operation(wrap_integer(left, width),
+                                      wrap_integer(right, width)), width)
+    return wrapped
+
+
+def _fixed_width_operands(operation, width):
+    def wrapped(left, right):
+        return operation(wrap_integer(left, width),
+                         wrap_integer(right, width))
+    return wrapped
+
+
+def arithmetic_definitions(integer_width=None):
+    """Create the Definitions for the arithmetic built-ins.
+
+    :param integer_width: If None integers have no limit, otherwise
+        operands (literals included) and integer results are wrapped to
+        signed integers this many bits wide.
+    :return: A list of direct-call Definitions."""
+    if integer_width is not None and integer_width < 1:
+        raise ValueError('arithmetic_definitions: integer_width must be '
+                         'positive.')
+    definitions = []
+    for (frozen, operation, result) in OPERATIONS:
+        if BOOLEAN_RESULT == result:
+            result_type = BooleanType()
+            if integer_width is not None:
+                operation = _fixed_width_operands(operation, integer_width)
+        else:
+            result_type = IntegerType()
+            if integer_width is not None:
+                operation = _fixed_width(operation, integer_width)
+        definitions.append(Definition(
+            thaw_sentence(frozen), operation,
+            FunctionType([IntegerType(), IntegerType()], result_type),
+            direct=True))
+    return definitions
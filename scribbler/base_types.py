@@ -8,32 +8,75 @@ from abc import (
     )
 
 
-from parse import (
-    string_to_signature,
-    )
 from scope import (
     Definition,
     )
+from sentence import (
+    thaw_sentence,
+    )
 
-class LittleScribeType(metaclass=ABCMeta):
-    """The base type used to create other types."""
+_interned_types = {}
+_subtype_cache = {}
+
+
+def _intern_key(arg):
+    if isinstance(arg, (list, tuple)):
+        return tuple(_intern_key(item) for item in arg)
+    return arg
+
+
+class _InternedTypeMeta(ABCMeta):
+    """Creating a type returns the existing instance with the same class and
+    arguments, if there is one. So equal types are identical."""
+
+    def __call__(cls, *args):
+        if not cls.interned:
+            return super(_InternedTypeMeta, cls).__call__(*args)
+        key = (cls, _intern_key(args))
+        instance = _interned_types.get(key)
+        if instance is None:
+            instance = super(_InternedTypeMeta, cls).__call__(*args)
+            _interned_types[key] = instance
+        return instance
+
+
+class LittleScribeType(metaclass=_InternedTypeMeta):
+    """The base type used to create other types.
+
+    Types are interned and immutable, and the results of is_super_of are
+    cached, so repeated checks are a dictionary lookup. Checks with a type
+    that is not interned are not cached, so it is not kept alive.
+
+    :cvar interned: If false every instance is a new type."""
+
+    interned = True
 
-    @abstractmethod
     def is_super_of(self, other):
         """Checks to see if self repersents a non-strict super type of other."""
+        if not (self.interned and getattr(other, 'interned', False)):
+            return self._is_super_of(other)
+        key = (self, other)
+        result = _subtype_cache.get(key)
+        if result is None:
+            result = _subtype_cache[key] = self._is_super_of(other)
+        return result
+
+    @abstractmethod
+    def _is_super_of(self, other):
+        """Uncached version of is_super_of, defined by each type."""
         pass
 
 
 class TypeType(LittleScribeType):
 
-    def is_super_of(self, other):
-        return isinstance(other, BaseType)
+    def _is_super_of(self, other):
+        return isinstance(other, LittleScribeType)
 
 
 class AnythingType(LittleScribeType):
     """Takes any type."""
 
-    def is_super_of(self, other):
+    def _is_super_of(self, other):
         """Checks to see if self repersents a non-strict super type of other."""
         return True
 
@@ -42,7 +85,7 @@ class AnythingType(LittleScribeType):
 class TextType(LittleScribeType):
     """Unevaluated sentences."""
 
-    def is_super_of(self, other):
+    def _is_super_of(self, other):
         return isinstance(other, TextType)
 
 
@@ -54,11 +97,11 @@ class FunctionType(LittleScribeType):
 
     def __init__(self, parameter_types, return_type):
         # Function ... to ...
-        self.parameter_types = parameter_types
+        self.parameter_types = tuple(parameter_types)
         self.parameter_count = len(parameter_types)
         self.return_type = return_type
 
-    def is_super_of(self, other):
+    def _is_super_of(self, other):
         return (isinstance(other, FunctionType) and
                 self.parameter_count == other.parameter_count and
                 self.return_type.is_super_of(other.return_type) and
@@ -76,7 +119,7 @@ class ListType(LittleScribeType):
     def __init__(self, element_type):
         self.element_type = element_type
 
-    def is_super_of(self, other):
+    def _is_super_of(self, other):
         return (isinstance(other, EmptyType) or
                 isinstance(other, ListType) and
                 self.element_type.is_super_of(other.element_type))
@@ -89,7 +132,7 @@ class ListType(LittleScribeType):
 class EmptyType(LittleScribeType):
     """Empty sequence value."""
 
-    def is_super_of(self, other):
+    def _is_super_of(self, other):
         return isinstance(other, EmptyType)
 
 
@@ -98,23 +141,30 @@ class NumberType(LittleScribeType):
 
     Currently limited to non-negative integers, but that might change."""
 
-    def is_super_of(self, other):
+    def _is_super_of(self, other):
         return isinstance(other, (NumberType, IntegerType))
 
 
 class IntegerType(NumberType):
 
-    def is_super_of(self, other):
+    def _is_super_of(self, other):
         return isinstance(other, IntegerType)
 
 
+class BooleanType(LittleScribeType):
+    """The result of a comparison, either true or false."""
+
+    def _is_super_of(self, other):
+        return isinstance(other, BooleanType)
+
+
 # Possibilities:
 class UnionType(LittleScribeType):
 
     def __init__(self, unioned_types):
-        self.unioned_types = unioned_types
+        self.unioned_types = tuple(unioned_types)
 
-    def is_super_of(self, other):
+    def _is_super_of(self, other):
         def any_option_super_of(single):
             return any(self_option.is_super_of(single)
                        for self_option in self.unioned_types)
@@ -131,18 +181,20 @@ class ExpressionType(LittleScribeType):
     def __init__(self, result_type):
         self.result_type = result_type
 
-    def is_super_of(self, other):
+    def _is_super_of(self, other):
         return (isinstance(other, ExpressionType) and
                 self.result_type.is_super_of(other.result_type))
 
 
 class StructureType(LittleScribeType):
 
+    interned = False
+
     def __init__(self, field_types):
         self.field_types = field_types
         #self.unique_id = new_id()
 
-    def is_super_of(self, other):
+    def _is_super_of(self, other):
         return self is other
 
 
@@ -159,19 +211,22 @@ def common_parent(left_type, right_type):
 _type_type = TypeType()
 
 
-def type_def(text, code, type=_type_type):
-    return Definition(string_to_signature(text), code, type)
+def type_def(frozen, code, type=_type_type):
+    """Create a type Definition from a frozen signature, see freeze_sentence."""
+    return Definition(thaw_sentence(frozen), code, type)
 
 
-type_type = type_def('Type.', _type_type)
-anything_type = type_def('Anything.', AnythingType())
-number_type = type_def('Number.', NumberType())
-integer_type = type_def('Integer.', IntegerType())
+type_type = type_def(('Type', '.'), _type_type)
+anything_type = type_def(('Anything', '.'), AnythingType())
+number_type = type_def(('Number', '.'), NumberType())
+integer_type = type_def(('Integer', '.'), IntegerType())
+boolean_type = type_def(('Boolean', '.'), BooleanType())
 function_over = type_def(
-    'Function Parameter list. to Return type. .',
+    ('Function', ('Parameter', 'list', '.'), 'to',
+     ('Return', 'type', '.'), '.'),
     FunctionType.make,
     FunctionType([ListType.make(_type_type)], _type_type))
-list_over = type_def('List of Item type. .',
+list_over = type_def(('List', 'of', ('Item', 'type', '.'), '.'),
     ListType.make, FunctionType([_type_type], _type_type))
 
 
@@ -181,6 +236,7 @@ little_scribe_types = {
     'anything': anything_type,
     'number': number_type,
     'integer': integer_type,
+    'boolean': boolean_type,
     'function': function_over,
     'list': list_over,
     }
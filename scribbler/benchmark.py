@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Benchmarks for the hot paths of Scribbler.
+
+Each benchmark times one stage (tokenizing, parsing, scope matching or
+evaluating) over a synthetic corpus. Results can be written out as JSON
+and compared against a saved baseline:
+
+    python3 benchmark.py --save baseline.json
+    python3 benchmark.py --compare baseline.json"""
+
+
+import argparse
+import functools
+import json
+import platform
+import sys
+import time
+
+from code import (
+    Action,
+    create_built_in_scope,
+    evaluate,
+    )
+from lazy import (
+    force,
+    lazy_evaluation,
+    )
+from parse import (
+    Parser,
+    string_to_signature,
+    )
+from scope import (
+    Definition,
+    Scope,
+    )
+from tokenization import (
+    text_token_stream,
+    )
+
+
+def number_word(number):
+    """Spell a number with lower case letters, so it can be part of a name."""
+    letters = ''
+    while True:
+        (number, digit) = divmod(number, 26)
+        letters = chr(ord('a') + digit) + letters
+        if 0 == number:
+            return letters
+
+
+def definitions_corpus(count):
+    """Many constant definitions, followed by a use of each."""
+    lines = ['Define Value {}. to be {}.'.format(number_word(i), i)
+             for i in range(count)]
+    lines.extend('Value {}.'.format(number_word(i)) for i in range(count))
+    return '\n'.join(lines) + '\n'
+
+
+def nesting_corpus(depth):
+    """One deeply nested sentence, closed by a single period."""
+    return 'Add 1 to ' * depth + '1.\n'
+
+
+def list_corpus(length):
+    """One long list built with Put onto."""
+    return ''.join('Put {} onto '.format(i) for i in range(length)) + \
+        'Empty list.\n'
+
+
+def call_chain_corpus(length):
+    """A chain of functions, each calling the one before it, so evaluating
+    the last one runs every function in the chain."""
+    lines = ['Define Step a Arg a. . to be Add Arg a. to 1.']
+    for i in range(1, length):
+        lines.append('Define Step {0} Arg {0}. . to be Step {1} Arg {0}. .'
+                     .format(number_word(i), number_word(i - 1)))
+    lines.append('Step {} 0.'.format(number_word(length - 1)))
+    return '\n'.join(lines) + '\n'
+
+
+def recursion_corpus(depth):
+    """One function that calls itself depth times.
+
+    If evaluates both branches unless evaluation is lazy, so this corpus is
+    evaluated under lazy_evaluation, see LAZY_CORPORA."""
+    return ('Define Count down N. . to be If Is N. less than 1. then 0 '
+            'else Add 1 to Count down Minus N. by 1. . . . .\n'
+            'Count down {}.\n'.format(depth))
+
+
+CORPORA = {
+    'definitions': (definitions_corpus, 1000),
+    'nesting': (nesting_corpus, 150),
+    'list': (list_corpus, 150),
+    'call_chain': (call_chain_corpus, 100),
+    'recursion': (recursion_corpus, 100),
+    }
+# The corpora that are only evaluated with lazy evaluation on.
+LAZY_CORPORA = {'recursion'}
+
+
+def run_paragraphs(paragraphs, scope):
+    """Evaluate paragraphs in scope, doing any Actions they return."""
+    for paragraph in paragraphs:
+        result = force(evaluate(paragraph, scope))
+        if isinstance(result, Action):
+            result.do(scope)
+
+
+def split_corpus(text):
+    """Parse a corpus into a scope.
+
+    :return: A tuple of the scope with all definitions in the corpus added
+        and the text of the paragraphs that are not definitions."""
+    scope = Scope(create_built_in_scope())
+    uses = []
+    for line in text.splitlines():
+        if line.startswith('Define '):
+            run_paragraphs(Parser(text_token_stream(line))
+                           .iter_paragraph(scope), scope)
+        else:
+            uses.append(line)
+    return (scope, '\n'.join(uses))
+
+
+def bench_tokenize(text):
+    def run():
+        for _ in text_token_stream(text):
+            pass
+    return run
+
+
+def bench_parse(text):
+    (scope, uses) = split_corpus(text)
+    tokens = list(text_token_stream(uses))
+
+    def run():
+        parser = Parser(iter(tokens))
+        while parser._token_stream.not_empty():
+            parser.parse_expression(scope)
+    return run
+
+
+def bench_evaluate(text, lazy=False):
+    (scope, uses) = split_corpus(text)
+    paragraphs = list(Parser(text_token_stream(uses)).iter_paragraph(scope))
+
+    def run():
+        with lazy_evaluation(lazy):
+            run_paragraphs(paragraphs, scope)
+    return run
+
+
+def bench_scope(count):
+    signatures = [string_to_signature('Value {} of Item. .'.format(
+        number_word(i))) for i in range(count)]
+    uses = [string_to_signature('Value {} of Item. .'.format(
+        number_word(i))) for i in range(count)]
+
+    def run():
+        scope = Scope()
+        for signature in signatures:
+            scope.add_definition(Definition(signature, None))
+        for use in uses:
+            scope.match_sentence(use)
+    return run
+
+
+def make_benchmarks(scale=1.0):
+    """Build the benchmark set.
+
+    :param scale: Multiplies the size of every corpus.
+    :return: Dictionary from benchmark name to (size, setup) where setup
+        is called to get the function to time."""
+    benchmarks = {}
+    for (name, (generate, size)) in sorted(CORPORA.items()):
+        size = max(1, int(size * scale))
+        text = generate(size)
+        evaluate = functools.partial(bench_evaluate,
+                                     lazy=name in LAZY_CORPORA)
+        for (stage, bench) in [('tokenize.', bench_tokenize),
+                               ('parse.', bench_parse),
+                               ('evaluate.', evaluate)]:
+            benchmarks[stage + name] = (size, functools.partial(bench, text))
+    size = max(1, int(300 * scale))
+    benchmarks['scope.add_and_match'] = (
+        size, functools.partial(bench_scope, size))
+    return benchmarks
+
+
+def time_function(function, repeat):
+    """Run function repeat times, return the fastest time in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run_benchmarks(scale=1.0, repeat=5, only=None):
+    """Run the benchmarks and collect the results in a JSON ready form.
+
+    :param only: If given, only benchmarks whose names start with it run."""
+    results = {}
+    for (name, (size, setup)) in sorted(make_benchmarks(scale).items()):
+        if only is not None and not name.startswith(only):
+            continue
+        results[name] = {
+            'seconds': time_function(setup(), repeat),
+            'size': size,
+            'repeat': repeat,
+            }
+    return {
+        'python': platform.python_version(),
+        'scale': scale,
+        'benchmarks': results,
+        }
+
+
+def compare_results(baseline, current, tolerance):
+    """Compare two result sets.
+
+    :return: A list of (name, baseline seconds, current seconds, ratio,
+        regressed) tuples for the benchmarks in both sets."""
+    rows = []
+    for (name, result) in sorted(current['benchmarks'].items()):
+        old = baseline['benchmarks'].get(name)
+        if old is None:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        rows.append((name, old['seconds'], result['seconds'], ratio,
+                     1 + tolerance < ratio))
+    return rows
+
+
+def main(argv=None):
+    argparser = argparse.ArgumentParser(
+        description='Benchmark the Scribbler hot paths.')
+    argparser.add_argument('--scale', type=float, default=1.0,
+        help='Multiply the size of every corpus.')
+    argparser.add_argument('--repeat', type=int, default=5,
+        help='Times to run each benchmark, the fastest is kept.')
+    argparser.add_argument('--only', metavar='PREFIX',
+        help='Only run benchmarks whose names start with PREFIX.')
+    argparser.add_argument('--save', metavar='FILE',
+        help='Write the results to FILE as JSON.')
+    argparser.add_argument('--compare', metavar='FILE',
+        help='Compare the results against a baseline saved with --save.')
+    argparser.add_argument('--tolerance', type=float, default=0.1,
+        help='Slow down allowed before --compare reports a regression.')
+    args = argparser.parse_args(argv)
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    current = run_benchmarks(args.scale, args.repeat, args.only)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(current, file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        rows = compare_results(baseline, current, args.tolerance)
+        for (name, old, new, ratio, regressed) in rows:
+            print('{:<28} {:10.6f} {:10.6f} {:6.2f}x{}'.format(
+                name, old, new, ratio, ' REGRESSED' if regressed else ''))
+        return 1 if any(row[4] for row in rows) else 0
+    if not args.save:
+        json.dump(current, sys.stdout, indent=2, sort_keys=True)
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,26 +4,55 @@
 Built-ins are created simply by adding a Definition to the a scope. Use
 `create_built_in_scope` to get an instance of this scope."""
 
+import itertools
+import pickle
+import weakref
+
+from arithmetic import (
+    arithmetic_definitions,
+    )
 from base_types import (
-    anything_type,
+    AnythingType,
+    BooleanType,
+    EmptyType,
     FunctionType,
+    IntegerType,
+    ListType,
+    )
+from data_io import (
+    file_integers,
+    file_lines,
+    write_items,
+    )
+from dependency import (
+    paragraph_reads,
+    )
+from errors import (
+    LSRunningError,
     )
-from parse import (
-    string_to_signature,
+from lazy import (
+    accepts_thunks,
+    force,
+    Thunk,
+    )
+from metrics import (
+    Metrics,
+    MetricsReport,
+    SCOPES_BUILT,
     )
 from primitive import (
     primitive_lookup,
     )
+from profiler import (
+    Profiler,
+    )
 from scope import (
     Definition,
     Scope,
     )
-
-
-class LSRunningError(Exception):
-    """Exception type for errors thrown by."""
-    # In the future should be replaced by or hiddened behind a Little Scribe
-    # error message.
+from sentence import (
+    thaw_sentence,
+    )
 
 
 class Action:
@@ -33,27 +62,111 @@ class Action:
 
 
 def evaluate(sentence, scope):
-    """Evaluate a Sentence within a Scope."""
+    """Evaluate a Sentence within a Scope.
+
+    Sentences with a type recorded by the type checker are known to be well
+    typed, which allows some shortcuts.
+
+    If lazy evaluation is on (see lazy.Thunk) the result may be a Thunk."""
     if sentence.is_primitive():
+        if isinstance(sentence.type, IntegerType):
+            return sentence[0].get_value()
         return primitive_lookup(sentence).code
     match = scope.match_sentence(sentence)
     params = []
-    # Define disables pre-evaluation.
-    if sentence[0].text == 'Define':
+    # Define (and the other binding sentences) disables pre-evaluation.
+    if match.binding:
         for item in sentence.iter_sub():
             params.append(item)
-        return match.code(scope, *params)
     # All other functions take the results of their arguments,
     # not the arguments themselves.
+    elif Thunk.enabled:
+        params = [evaluate(item, scope) if item.is_primitive()
+                  else Thunk(evaluate, item, scope)
+                  for item in sentence.iter_sub()]
+        if 0 == len(params):
+            return match.code
     else:
-        for item in sentence.iter_sub():
-            params.append(evaluate(item, scope))
+        params = [evaluate(item, scope) for item in sentence.iter_sub()]
         # TODO: I need a better divide than this.
         # If there are no arguments, don't evaluate.
         if 0 == len(params):
             return match.code
+    code = match.code
+    if sentence.type is not None:
+        # The argument count has already been checked.
+        code = getattr(code, 'unchecked', code)
+    if Thunk.enabled and not getattr(code, 'accepts_thunks', False):
+        params = [force(param) for param in params]
+    profiler = Profiler.active
+    if profiler is None:
+        if match.direct:
+            return code(*params)
         # Pass in the scope for user defined functions.
-        return match.code(scope, *params)
+        return code(scope, *params)
+    profiler.enter(match)
+    try:
+        if match.direct:
+            return code(*params)
+        return code(scope, *params)
+    finally:
+        profiler.exit()
+
+
+class UserFunction:
+    """The code of a function defined in Little Scribe.
+
+    This is a class, rather than a Python closure, so it can be sent to
+    another process along with the Definitions it is in. It is still a
+    Little Scribe closure: the body is evaluated in the scope the function
+    was defined in, with the parameters added, not in the calling scope.
+
+    :ivar params: The parameter Sentences from the head of the definition.
+    :ivar body: The Sentence evaluated when the function is called.
+    :ivar scope: The Scope the function was defined in. It is left out when
+        the function is sent to another process, until it is bound there
+        (see bind_definitions) the calling scope is used instead."""
+
+    def __init__(self, params, body, scope=None):
+        self.params = params
+        self.body = body
+        self.scope = scope
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['scope'] = None
+        return state
+
+    def __call__(self, scope, *args):
+        if len(args) != len(self.params):
+            raise LSRunningError('Incorrect number of arguments. expected: ' +
+                str(len(self.params)) + ' actual: ' + str(len(args)))
+        return self.unchecked(scope, *args)
+
+    @accepts_thunks
+    def unchecked(self, scope, *args):
+        """Call the function without checking the number of arguments."""
+        local_scope = Scope(scope if self.scope is None else self.scope)
+        metrics = Metrics.active
+        if metrics is not None:
+            metrics.add(SCOPES_BUILT)
+        for (param, arg) in zip(self.params, args):
+            new_def = Definition(param, arg)
+            local_scope.add_definition(new_def)
+        # Head is defined in the parent scope, so it can recurse.
+        return evaluate(self.body, local_scope)
+
+
+accepts_thunks(UserFunction)
+
+
+def bind_definitions(definitions, scope):
+    """Add Definitions sent from another process to scope, binding the
+    functions among them to it."""
+    for definition in definitions:
+        if isinstance(definition.code, UserFunction):
+            definition.code.scope = scope
+        scope.add_definition(definition)
 
 
 # TODO: currently actually the general define for both values and functions.
@@ -70,20 +183,9 @@ def define_function(scope, head, body):
     if 0 == len(params):
         return AddDefAction(Definition(head, body))
 
-    def eval_function(scope, *args):
-        if len(args) != len(params):
-            raise LSRunningError('Incorrect number of arguments. expected: ' +
-                str(len(params)) + ' actual: ' + str(len(args)))
-        local_scope = Scope(scope)
-        for (param, arg) in zip(params, args):
-            new_def = Definition(param, arg)
-            local_scope.add_definition(new_def)
-        # Head should be defined in the parent scope.
-        return evaluate(body, local_scope)
-
-    ftype = FunctionType([anything_type] * len(params), anything_type)
-
-    return AddDefAction(Definition(head, eval_function, ftype))
+    ftype = FunctionType([AnythingType()] * len(params), AnythingType())
+    return AddDefAction(Definition(
+        head, UserFunction(params, body, scope), ftype))
 
 
 def define_constant(scope, head, body):
@@ -120,7 +222,13 @@ class ListObject:
 
     def to_under_list(self):
         """Convert this to a python list."""
-        return [self.head] + self.tail.to_under_list()
+        # A loop, so long lists do not run out of stack.
+        items = []
+        node = self
+        while isinstance(node, ListObject):
+            items.append(force(node.head))
+            node = force(node.tail)
+        return items + node.to_under_list()
 
 
 class EmptyList:
@@ -130,26 +238,340 @@ class EmptyList:
         return list()
 
 
-def create_built_in_scope():
-    """Returns a scope with all the built-in functions defined."""
+_END = object()
+
+
+class StreamList:
+    """A list with items pulled from a Python iterator as they are needed.
+
+    Each item is pulled once and kept by its cell, but cells do not refer
+    back to earlier cells, so a stream can be walked in constant space as
+    long as nothing holds on to its start."""
+
+    def __init__(self, iterator):
+        self._iterator = iterator
+        self._head = _END
+        self._tail = None
+
+    def _pull(self):
+        if self._iterator is not None:
+            self._head = next(self._iterator, _END)
+            if self._head is not _END:
+                self._tail = StreamList(self._iterator)
+            self._iterator = None
+
+    def is_empty(self):
+        self._pull()
+        return self._head is _END
+
+    @property
+    def head(self):
+        if self.is_empty():
+            raise LSRunningError('Head of an empty list.')
+        return self._head
+
+    @property
+    def tail(self):
+        if self.is_empty():
+            raise LSRunningError('Tail of an empty list.')
+        return self._tail
+
+    def to_under_list(self):
+        """Convert this to a python list."""
+        items = []
+        cell = self
+        while not cell.is_empty():
+            items.append(force(cell._head))
+            cell = cell._tail
+        return items
+
+
+def is_empty_list(value):
+    """Check for the end of a list, of any kind."""
+    return (isinstance(value, EmptyList) or
+            isinstance(value, StreamList) and value.is_empty())
+
+
+def choose(scope, condition, result, alternative):
+    """The If built-in, only the chosen branch is forced."""
+    return result if force(condition) else alternative
+
+
+def make_list(items):
+    """Convert a Python list to a Little Scribe list."""
+    result = EmptyList()
+    for item in reversed(items):
+        result = ListObject(item, result)
+    return result
+
+
+def split_chunks(items, count):
+    """Split a Python list into (at most) count chunks of about equal size."""
+    size = max(1, -(-len(items) // count))
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def _map_items(scope, function, items):
+    return [force(function(scope, item)) for item in items]
+
+
+def _fold_items(scope, function, items):
+    result = items[0]
+    for item in items[1:]:
+        result = force(function(scope, result, item))
+    return result
+
+
+# The scopes in a list worker process, see _start_list_worker.
+_list_worker_built_ins = None
+_list_worker_key = None
+_list_worker_scope = None
+
+
+def _start_list_worker(options, lazy):
+    """Create the built-ins once in each worker, they are kept between
+    calls. The worker evaluates lazily if lazy is true."""
+    global _list_worker_built_ins
+    Thunk.enabled = lazy
+    _list_worker_built_ins = create_built_in_scope(*options)
+
+
+def _run_list_chunk(key, data, work, function, items):
+    """Run work over a chunk of items in a worker.
+
+    The definitions the function reads are rebuilt on the built-ins when
+    key is new to the worker, data holds them pickled. It is only sent
+    along with some chunks.
+
+    :return: (True, result), or (False, None) if key is new to the worker
+        and data was not sent."""
+    global _list_worker_key, _list_worker_scope
+    if key != _list_worker_key:
+        if data is None:
+            return (False, None)
+        scope = _list_worker_built_ins
+        for definitions in pickle.loads(data):
+            scope = Scope(scope)
+            bind_definitions(definitions, scope)
+        _list_worker_key = key
+        _list_worker_scope = scope
+    function.scope = _list_worker_scope
+    return (True, work(_list_worker_scope, function, items))
+
+
+def _function_layers(function, stop):
+    """Get the Definitions the body of a function may read, in layers (see
+    Scope.definition_layers) up to the scope stop.
+
+    :return: The layers, or None if it reads a Definition from a scope
+        that is not visible where the function was made."""
+    body_scope = Scope(function.scope)
+    for param in function.params:
+        body_scope.add_definition(Definition(param, None))
+    reads = [definition for definition in
+             paragraph_reads(function.body, body_scope)
+             if definition.code is not None]
+    layers = function.scope.definition_layers(stop, reads)
+    found = sum(len(layer) for layer in layers)
+    built_ins = sum(1 for definition in reads
+                    if getattr(definition, '_scope', None) is stop)
+    if found + built_ins != len(reads):
+        return None
+    return layers
+
+
+def create_built_in_scope(integer_width=None, data_files=(), jobs=1,
+                          library_path=('.',)):
+    """Returns a scope with all the built-in functions defined.
+
+    Signatures are written frozen (see sentence.freeze_sentence) so they do
+    not have to be parsed on every start up.
+
+    :param integer_width: Bits in a fixed width integer, None for no limit.
+        See arithmetic_definitions.
+    :param data_files: Names of the files programs can read, Little Scribe
+        has no strings so they are refered to by number, starting at 1.
+    :param jobs: Number of processes the Parallel built-ins may use.
+    :param library_path: Directories Import looks for libraries in."""
     scope = Scope()
 
-    def add_text(text, code, type=None):
-        scope.add_definition(Definition(string_to_signature(text), code, type))
+    def add_frozen(frozen, code, type=None, direct=False, pure=True,
+                   binding=False, defining=False):
+        scope.add_definition(Definition(thaw_sentence(frozen), code, type,
+                                        direct, pure, binding, defining))
 
     #for definition in create_type_list():
     #    scope.add_definition(definition)
-    add_text('Define Head. to be Body. .', define_function)
-    add_text('Add Left hand side. to Right hand side. .',
-        lambda scope, left, right: left + right)
-    add_text('Minus Left hand side. by Right hand side. .',
-        lambda scope, left, right: left - right)
-
-    add_text('Put Head. onto Tail. .',
-        lambda scope, head, tail: ListObject(head, tail))
-    add_text('Head of List. .', lambda scope, list: list.head)
-    add_text('Tail of List. .', lambda scope, list: list.tail)
-    add_text('Empty list.', EmptyList())
-    add_text('Is This value. empty.',
-        lambda scope, value: isinstance(value, EmptyList))
+    # Define Head. to be Body. .
+    add_frozen(('Define', ('Head', '.'), 'to', 'be', ('Body', '.'), '.'),
+        define_function, binding=True, defining=True)
+    for definition in arithmetic_definitions(integer_width):
+        scope.add_definition(definition)
+
+    # Put Head. onto Tail. .
+    any_list = ListType(AnythingType())
+    add_frozen(('Put', ('Head', '.'), 'onto', ('Tail', '.'), '.'),
+        accepts_thunks(lambda scope, head, tail: ListObject(head, tail)),
+        FunctionType([AnythingType(), any_list], any_list))
+    # Head of List. .
+    add_frozen(('Head', 'of', ('List', '.'), '.'),
+        lambda scope, list: list.head,
+        FunctionType([any_list], AnythingType()))
+    # Tail of List. .
+    add_frozen(('Tail', 'of', ('List', '.'), '.'),
+        lambda scope, list: list.tail,
+        FunctionType([any_list], any_list))
+    add_frozen(('Empty', 'list', '.'), EmptyList(), EmptyType())
+    # Is This value. empty.
+    add_frozen(('Is', ('This', 'value', '.'), 'empty', '.'),
+        lambda scope, value: is_empty_list(value),
+        FunctionType([AnythingType()], BooleanType()))
+
+    integer_list = ListType(IntegerType())
+    # Range from First. to Last. .
+    add_frozen(('Range', 'from', ('First', '.'), 'to', ('Last', '.'), '.'),
+        lambda first, last: StreamList(iter(range(first, last + 1))),
+        FunctionType([IntegerType(), IntegerType()], integer_list), True)
+    # Count from First. .
+    add_frozen(('Count', 'from', ('First', '.'), '.'),
+        lambda first: StreamList(itertools.count(first)),
+        FunctionType([IntegerType()], integer_list), True)
+
+    def data_file(number):
+        if not 1 <= number <= len(data_files):
+            raise LSRunningError('There is no data file ' + str(number))
+        return data_files[number - 1]
+
+    # Lines of file Number. .
+    add_frozen(('Lines', 'of', 'file', ('Number', '.'), '.'),
+        lambda number: StreamList(file_lines(data_file(number))),
+        FunctionType([IntegerType()], any_list), True, False)
+    # Integers of file Number. .
+    add_frozen(('Integers', 'of', 'file', ('Number', '.'), '.'),
+        lambda number: StreamList(file_integers(data_file(number))),
+        FunctionType([IntegerType()], integer_list), True, False)
+    # Write List. to file Number. .
+    add_frozen(('Write', ('List', '.'), 'to', 'file', ('Number', '.'), '.'),
+        lambda list, number: write_items(data_file(number),
+                                         list.to_under_list()),
+        FunctionType([any_list, IntegerType()], IntegerType()), True, False)
+    # If Condition. then Result. else Alternative. .
+    add_frozen(('If', ('Condition', '.'), 'then', ('Result', '.'), 'else',
+                ('Alternative', '.'), '.'),
+        accepts_thunks(choose),
+        FunctionType([BooleanType(), AnythingType(), AnythingType()],
+                     AnythingType()))
+    add_frozen(('Show', 'metrics', '.'), MetricsReport(), pure=False)
+
+    def import_library(call_scope, name):
+        # Only needed here, so it is not loaded on start up.
+        from library import (
+            find_library,
+            ImportAction,
+            )
+        return ImportAction(find_library(name, library_path))
+
+    # Import Name. .
+    add_frozen(('Import', ('Name', '.'), '.'), import_library,
+               binding=True, defining=True)
+
+    options = (integer_width, data_files, 1, library_path)
+    # The process pool, started on first use and kept for the session, if
+    # the evaluation mode does not change, and the key of the last
+    # definitions sent to it.
+    executor = None
+    executor_lazy = None
+    sent_key = None
+
+    def get_executor():
+        nonlocal executor, executor_lazy, sent_key
+        if executor is not None and executor_lazy != Thunk.enabled:
+            executor.shutdown(wait=False)
+            executor = None
+        if executor is None:
+            # Only needed here, so it is not loaded on start up.
+            from concurrent.futures import (
+                ProcessPoolExecutor,
+                )
+            executor_lazy = Thunk.enabled
+            sent_key = None
+            executor = ProcessPoolExecutor(
+                jobs, initializer=_start_list_worker,
+                initargs=(options, executor_lazy))
+            weakref.finalize(scope, executor.shutdown, wait=False)
+        return executor
+
+    def make_function(call_scope, head, body, count):
+        params = list(head.iter_sub())
+        if len(params) != count:
+            raise LSRunningError('Expected {} parameters in: {}'.format(
+                count, head))
+        return UserFunction(params, body, call_scope)
+
+    def run_chunks(call_scope, work, function, items):
+        """Run work over chunks of items, in a process pool if there are
+        enough items to make it worth it.
+
+        :return: The result of work for each chunk, in order."""
+        if not items:
+            return []
+        nonlocal sent_key
+        if jobs <= 1 or len(items) < 2 * jobs:
+            return [work(call_scope, function, items)]
+        layers = _function_layers(function, scope)
+        try:
+            data = None if layers is None else pickle.dumps(layers)
+        except (pickle.PicklingError, TypeError, AttributeError,
+                RecursionError):
+            # Such as a stream read from a file, kept in a parameter.
+            data = None
+        if data is None:
+            return [work(call_scope, function, items)]
+        # Only needed here, so it is not loaded on start up.
+        import hashlib
+        key = hashlib.sha256(data).digest()
+        executor = get_executor()
+        chunks = split_chunks(items, jobs * 4)
+        # New definitions go with the first chunk for each worker, the
+        # other chunks only carry the key. A worker that gets one of them
+        # before it has the definitions hands it back and it is sent again
+        # with them.
+        first = 0 if key == sent_key else jobs
+        sent_key = key
+        futures = [executor.submit(_run_list_chunk, key,
+                                   data if index < first else None,
+                                   work, function, chunk)
+                   for (index, chunk) in enumerate(chunks)]
+        results = [future.result() for future in futures]
+        retries = {index: executor.submit(_run_list_chunk, key, data, work,
+                                          function, chunks[index])
+                   for (index, (done, _)) in enumerate(results) if not done}
+        return [retries[index].result()[1] if index in retries else result
+                for (index, (_, result)) in enumerate(results)]
+
+    def parallel_map(call_scope, head, list, body):
+        function = make_function(call_scope, head, body, 1)
+        items = force(evaluate(list, call_scope)).to_under_list()
+        chunks = run_chunks(call_scope, _map_items, function, items)
+        return make_list([item for chunk in chunks for item in chunk])
+
+    def parallel_fold(call_scope, head, list, start, body):
+        """Fold with an associative function, so the chunks can be folded
+        seperately and then their results folded together."""
+        function = make_function(call_scope, head, body, 2)
+        items = force(evaluate(list, call_scope)).to_under_list()
+        result = force(evaluate(start, call_scope))
+        for partial in run_chunks(call_scope, _fold_items, function, items):
+            result = force(function(call_scope, result, partial))
+        return result
+
+    # These start processes, so they are not run in other workers.
+    # Parallel map Head. over List. to be Body. .
+    add_frozen(('Parallel', 'map', ('Head', '.'), 'over', ('List', '.'),
+                'to', 'be', ('Body', '.'), '.'),
+        parallel_map, pure=False, binding=True)
+    # Parallel fold Head. over List. from Start. to be Body. .
+    add_frozen(('Parallel', 'fold', ('Head', '.'), 'over', ('List', '.'),
+                'from', ('Start', '.'), 'to', 'be', ('Body', '.'), '.'),
+        parallel_fold, pure=False, binding=True)
     return scope
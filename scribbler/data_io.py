@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Reading and writing data files in bulk.
+
+Files are read in large chunks and split up in Python, rather than asking
+the file for one line or number at a time. Output is gathered up and
+written out in a few large writes. The readers are generators so code.py
+can wrap them in lazy lists."""
+
+
+BUFFER_SIZE = 1 << 16
+OUTPUT_BUFFER_LINES = 256
+
+
+def read_chunks(file_name, size=BUFFER_SIZE):
+    """Iterate over the text of a file, size characters at a time."""
+    with open(file_name) as file:
+        while True:
+            chunk = file.read(size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def file_lines(file_name, size=BUFFER_SIZE):
+    """Iterate over the lines of a file, without their line endings."""
+    partial = ''
+    for chunk in read_chunks(file_name, size):
+        lines = (partial + chunk).split('\n')
+        partial = lines.pop()
+        yield from lines
+    if partial:
+        yield partial
+
+
+def file_integers(file_name, size=BUFFER_SIZE):
+    """Iterate over the white space separated integers in a file.
+
+    :raises ValueError: If anything else is found in the file."""
+    partial = ''
+    for chunk in read_chunks(file_name, size):
+        words = (partial + chunk).split()
+        # The last word may carry on into the next chunk.
+        if words and not chunk[-1].isspace():
+            partial = words.pop()
+        else:
+            partial = ''
+        for word in words:
+            yield int(word)
+    if partial:
+        yield int(partial)
+
+
+def write_items(file_name, items):
+    """Write items to a file, one per line, with a single write.
+
+    :return: The number of items written."""
+    items = [str(item) for item in items]
+    with open(file_name, 'w') as file:
+        file.write(''.join(item + '\n' for item in items))
+    return len(items)
+
+
+class OutputBuffer:
+    """Collects lines of output and writes them out in groups.
+
+    :ivar file: The file written to.
+    :ivar limit: Number of lines held before they are written out."""
+
+    def __init__(self, file, limit=OUTPUT_BUFFER_LINES):
+        self.file = file
+        self.limit = limit
+        self._lines = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def write_line(self, value):
+        self._lines.append(str(value) + '\n')
+        if self.limit <= len(self._lines):
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            self.file.write(''.join(self._lines))
+            self._lines = []
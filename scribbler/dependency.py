@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Dependency analysis over parsed paragraphs.
+
+A paragraph either produces definitions (it is a Define or Import
+sentence, which evaluates to an Action that adds them) or uses them. A
+paragraph that uses only pure definitions does not depend on any other
+paragraph except the ones that defined what it reads, so it can be
+evaluated in any order once those definitions exist.
+
+Reads are found by matching every sub-sentence against the scope, and
+through the bodies of the user defined functions that are read, matched
+against the scope each function was defined in. Sentences that could
+match a definition added later are still counted, so this is an over
+estimate, which is safe: a paragraph is only ever thought less pure than
+it is."""
+
+
+from scope import (
+    NoDefinitionError,
+    )
+
+
+def produces_definition(paragraph, scope):
+    """Check if a paragraph is a Define or Import sentence, or any other
+    with a defining Definition (see Definition.defining)."""
+    if paragraph.is_primitive():
+        return False
+    try:
+        return scope.match_sentence(paragraph).defining
+    except NoDefinitionError:
+        return False
+
+
+def _add_reads(sentence, scope, reads):
+    if sentence.is_primitive():
+        return
+    try:
+        definition = scope.match_sentence(sentence)
+    except NoDefinitionError:
+        # Usually a parameter, which is only defined in the body's scope.
+        definition = None
+    if definition is not None and definition.defining:
+        # Defines inside of bodies are not run until they are used.
+        return
+    if definition is not None and id(definition) not in reads:
+        reads[id(definition)] = definition
+        body = getattr(definition.code, 'body', None)
+        if body is not None:
+            body_scope = definition.code.scope
+            _add_reads(body, scope if body_scope is None else body_scope,
+                       reads)
+    for item in sentence.iter_sub():
+        _add_reads(item, scope, reads)
+
+
+def paragraph_reads(paragraph, scope):
+    """Get the Definitions a paragraph may read when evaluated in scope.
+
+    :return: A list of Definitions, each one only once."""
+    reads = {}
+    _add_reads(paragraph, scope, reads)
+    return list(reads.values())
+
+
+def is_pure(paragraph, scope):
+    """Check if a paragraph can be evaluated apart from the others.
+
+    It must not produce a definition and must only read pure ones."""
+    if produces_definition(paragraph, scope):
+        return False
+    return all(definition.pure
+               for definition in paragraph_reads(paragraph, scope))
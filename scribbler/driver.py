@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""The Scribbler command line driver, see README.md for its usage.
+
+Every FILE is run into the same scope, in order, then interactive mode
+reads from standard input. Tokenizing does not depend on the scope, so
+with --jobs the files are tokenized ahead of time in other processes while
+the earlier files are being evaluated, and paragraphs that do not depend
+on each other are evaluated in a process pool (see parallel)."""
+
+
+import argparse
+import contextlib
+import sys
+
+from code import (
+    create_built_in_scope,
+    )
+from lazy import (
+    lazy_evaluation,
+    )
+from metrics import (
+    Metrics,
+    )
+from profiler import (
+    Profiler,
+    )
+from repl import (
+    error_message,
+    run_tokens,
+    )
+from result_cache import (
+    DEFAULT_CACHE_BYTES,
+    ResultCache,
+    )
+from scope import (
+    Scope,
+    )
+from tokenization import (
+    file_token_stream,
+    open_token_stream,
+    )
+from typecheck import (
+    INFER,
+    STRICT,
+    )
+
+
+def make_argparser():
+    argparser = argparse.ArgumentParser(
+        prog='scribbler',
+        description='Scribbler, the default Little Scribe compiler.')
+    argparser.add_argument('files', nargs='*', metavar='FILES',
+        help='Files to read definitions from, in order.')
+    argparser.add_argument('-x', '--exit', action='store_true',
+        help='Exit after reading FILES, without entering interactive mode.')
+    argparser.add_argument('-i', '--ignore-errors', action='store_const',
+        const=None, default=0, dest='error_limit',
+        help='Skip paragraphs with errors, -i=N gives up after N.')
+    argparser.add_argument('--error-limit', type=int, metavar='N',
+        dest='error_limit',
+        help='Skip up to N paragraphs with errors, the same as -i=N.')
+    argparser.add_argument('-j', '--jobs', type=int, default=1,
+        help='Number of processes used to tokenize and evaluate FILES.')
+    argparser.add_argument('--time', action='store_true',
+        help='Report the time spent in each phase on standard error.')
+    argparser.add_argument('--lazy', action='store_true',
+        help='Only evaluate arguments when they are used.')
+    argparser.add_argument('--type-check', choices=[INFER, STRICT],
+        help='Type check each paragraph, strict makes type errors errors.')
+    argparser.add_argument('--profile', action='store_true',
+        help='Report the time spent in each definition on standard error.')
+    argparser.add_argument('--profile-collapsed', metavar='FILE',
+        help='Profile and write the stacks to FILE for flamegraph.pl.')
+    argparser.add_argument('--metrics', action='store_true',
+        help='Count work done on the hot paths, see `Show metrics.`.')
+    argparser.add_argument('-d', '--data', action='append', default=[],
+        metavar='FILE',
+        help='A data file for the program, numbered from 1 in order given.')
+    argparser.add_argument('-L', '--library-path', action='append',
+        default=[], metavar='DIR',
+        help='Look for libraries in DIR, before the current directory.')
+    argparser.add_argument('--cache', metavar='DIR',
+        help='Keep the results of pure paragraphs in DIR between runs.')
+    argparser.add_argument('--cache-size', type=int,
+        default=DEFAULT_CACHE_BYTES, metavar='BYTES',
+        help='Remove the least recently used results over this size.')
+    return argparser
+
+
+def attach_error_limit(argv):
+    """Rewrite -iN, -i=N and --ignore-errors=N as --error-limit N.
+
+    N is only taken when attached, so `-i FILE` does not read FILE as N."""
+    result = []
+    for (index, arg) in enumerate(argv):
+        if '--' == arg:
+            return result + list(argv[index:])
+        for prefix in ('--ignore-errors=', '-i=', '-i'):
+            if arg.startswith(prefix) and arg != '-i':
+                result.extend(['--error-limit', arg[len(prefix):]])
+                break
+        else:
+            result.append(arg)
+    return result
+
+
+def parse_args(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    return make_argparser().parse_args(attach_error_limit(argv))
+
+
+def tokenize_file(file_name):
+    """Tokenize a whole file, so it can be done in another process."""
+    return list(file_token_stream(file_name))
+
+
+def iter_file_tokens(file_names, jobs=1):
+    """Iterate over the token streams of each file, in order."""
+    if 1 < jobs and 1 < len(file_names):
+        # Only needed with --jobs, so it is not loaded on start up.
+        from concurrent.futures import (
+            ProcessPoolExecutor,
+            )
+        with ProcessPoolExecutor(jobs) as executor:
+            for tokens in executor.map(tokenize_file, file_names):
+                yield iter(tokens)
+    else:
+        for file_name in file_names:
+            yield file_token_stream(file_name)
+
+
+def remaining_errors(error_limit, skipped):
+    """The error limit left over after skipped errors, None for no limit."""
+    if error_limit is None:
+        return None
+    return max(0, error_limit - skipped)
+
+
+def main(argv=None, input_file=sys.stdin, output_file=sys.stdout,
+         error_file=sys.stderr):
+    """Run the driver.
+
+    :return: The exit status, 1 if an error stopped the run."""
+    args = parse_args(argv)
+    if args.jobs < 1:
+        print('scribbler: --jobs must be at least 1', file=error_file)
+        return 2
+    timer = Profiler() if args.time else None
+    library_path = args.library_path + ['.']
+    result_cache = None
+    if args.cache is not None:
+        result_cache = ResultCache(args.cache, args.cache_size)
+    if 1 < args.jobs:
+        from parallel import (
+            ParallelRunner,
+            )
+        runner = ParallelRunner(args.jobs, args.data, args.lazy,
+                                library_path=library_path,
+                                result_cache=result_cache)
+        scope = runner.scope
+    else:
+        runner = None
+        scope = Scope(create_built_in_scope(data_files=args.data,
+                                            library_path=library_path))
+    skipped = 0
+    # The modes that are switched on for the whole run.
+    session = contextlib.ExitStack()
+    if args.metrics:
+        session.enter_context(Metrics())
+    if args.lazy:
+        session.enter_context(lazy_evaluation())
+    profiler = None
+    if args.profile or args.profile_collapsed is not None:
+        profiler = session.enter_context(Profiler())
+        if timer is None:
+            # The phases are profiled too, around the definitions in them.
+            timer = profiler
+    try:
+        for tokens in iter_file_tokens(args.files, args.jobs):
+            error_limit = remaining_errors(args.error_limit, skipped)
+            if runner is None:
+                errors = run_tokens(tokens, scope, output_file, error_limit,
+                                    error_file, timer, args.type_check,
+                                    result_cache=result_cache)
+            else:
+                errors = runner.run(tokens, output_file, error_limit,
+                                    error_file, timer, args.type_check)
+                scope = runner.scope
+            skipped += len(errors)
+        if not args.exit:
+            # Results are written as soon as they are ready.
+            run_tokens(open_token_stream(input_file), scope, output_file,
+                       remaining_errors(args.error_limit, skipped),
+                       error_file, timer, args.type_check, buffer_lines=1,
+                       result_cache=result_cache)
+    except Exception as error:
+        print(error_message(getattr(error, 'paragraph_number', None), error),
+              file=error_file)
+        return 1
+    finally:
+        session.close()
+        if timer is not None and timer is not profiler:
+            timer.write_report(error_file)
+        if args.profile:
+            profiler.write_report(error_file)
+        if args.profile_collapsed is not None:
+            with open(args.profile_collapsed, 'w') as file:
+                profiler.write_collapsed(file)
+    return 0
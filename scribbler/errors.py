@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""Errors raised while Little Scribe runs.
+
+This module imports nothing, so the built-ins in any module can raise
+them. code re-exports LSRunningError."""
+
+
+class LSRunningError(Exception):
+    """Exception type for errors thrown by."""
+    # In the future should be replaced by or hiddened behind a Little Scribe
+    # error message.
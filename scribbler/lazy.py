@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Lazy evaluation with thunks.
+
+While Thunk.enabled is true evaluate wraps the arguments of each call in a
+Thunk instead of evaluating them. A Thunk runs at most once, when a value
+is actually needed. Built-ins get their arguments forced for them, unless
+they are marked with accepts_thunks."""
+
+
+from contextlib import (
+    contextmanager,
+    )
+
+
+class Thunk:
+    """A delayed computation that remembers its result.
+
+    :cvar enabled: True while evaluation is lazy."""
+
+    enabled = False
+
+    def __init__(self, function, *args):
+        self._function = function
+        self._args = args
+        self._value = None
+
+    def is_forced(self):
+        return self._function is None
+
+    def force(self):
+        """Get the value, running the computation if it has not been run."""
+        if self._function is not None:
+            value = self._function(*self._args)
+            if isinstance(value, Thunk):
+                value = value.force()
+            self._value = value
+            self._function = None
+            self._args = None
+        return self._value
+
+
+def force(value):
+    """Get the value of a Thunk, other values are returned unchanged."""
+    if isinstance(value, Thunk):
+        return value.force()
+    return value
+
+
+def accepts_thunks(function):
+    """Mark a function as taking its arguments without forcing them."""
+    function.accepts_thunks = True
+    return function
+
+
+@contextmanager
+def lazy_evaluation(enabled=True):
+    """Switch lazy evaluation on (or off) within a with block."""
+    old = Thunk.enabled
+    Thunk.enabled = enabled
+    try:
+        yield
+    finally:
+        Thunk.enabled = old
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Precompiled libraries of definitions.
+
+A library is a page of definitions that has already been parsed. Every
+head and body is stored frozen (see sentence.freeze_sentence) with
+marshal, so loading one runs neither the tokenizer nor the parser. The
+file starts with a symbol index of the heads, the bodies follow it:
+
+    MAGIC
+    index size (4 bytes, big endian)
+    index: marshalled list of (frozen head, body offset, body size)
+    bodies: each one marshalled, offsets count from the end of the index
+
+`Import Name. .` finds the library by name and adds it to the scope as
+lazy definitions, only the heads go into the scope's tree. The file is
+memory mapped and a Definition is only made, reading and thawing its body,
+when it is matched. See Scope.add_lazy_definitions.
+
+Compile a library with:
+
+    python3 library.py SOURCE LIBRARY"""
+
+
+import marshal
+import mmap
+import os
+from stat import (
+    S_ISREG,
+    )
+import struct
+import sys
+
+from base_types import (
+    AnythingType,
+    FunctionType,
+    )
+from code import (
+    Action,
+    create_built_in_scope,
+    define_function,
+    evaluate,
+    UserFunction,
+    )
+from parse import (
+    Parser,
+    )
+from scope import (
+    Definition,
+    Scope,
+    )
+from sentence import (
+    freeze_sentence,
+    thaw_sentence,
+    )
+from tokenization import (
+    file_token_stream,
+    PeriodToken,
+    )
+
+
+MAGIC = b'LSLIB\x01\n'
+LIBRARY_SUFFIX = '.lsl'
+_SIZE = struct.Struct('>I')
+
+
+class LibraryError(Exception):
+    """A library could not be found, read or compiled."""
+
+
+def library_file_name(name):
+    """Get the file name of a library from its name, a Sentence of words.
+
+    `List tools.` is in list-tools.lsl."""
+    words = []
+    for item in name:
+        if isinstance(item, PeriodToken):
+            break
+        if not hasattr(item, 'text'):
+            raise LibraryError('Library names are only words: ' + str(name))
+        words.append(item.text.lower())
+    return '-'.join(words) + LIBRARY_SUFFIX
+
+
+def compile_library(source_name, library_name):
+    """Compile a page of definitions into a library file.
+
+    :raise LibraryError: If the page has anything but definitions."""
+    scope = Scope(create_built_in_scope())
+    parser = Parser(file_token_stream(source_name))
+    symbols = []
+    for paragraph in parser.iter_paragraph(scope):
+        if (paragraph.is_primitive() or
+                scope.match_sentence(paragraph).code is not define_function):
+            raise LibraryError('Libraries may only contain definitions, '
+                               'found: ' + str(paragraph))
+        action = evaluate(paragraph, scope)
+        action.do(scope)
+        head = action.definition.name
+        body = list(paragraph.iter_sub())[1]
+        symbols.append((freeze_sentence(head), freeze_sentence(body)))
+    write_library(library_name, symbols)
+
+
+def write_library(library_name, symbols):
+    """Write a library file.
+
+    :param symbols: List of (frozen head, frozen body) pairs."""
+    index = []
+    bodies = []
+    offset = 0
+    for (head, body) in symbols:
+        data = marshal.dumps(body)
+        index.append((head, offset, len(data)))
+        bodies.append(data)
+        offset += len(data)
+    index_data = marshal.dumps(index)
+    with open(library_name, 'wb') as file:
+        file.write(MAGIC)
+        file.write(_SIZE.pack(len(index_data)))
+        file.write(index_data)
+        for data in bodies:
+            file.write(data)
+
+
+class Library:
+    """An open library file, a source for Scope.add_lazy_definitions.
+
+    :ivar file_name: Where the library was loaded from.
+    :ivar stamp: The (modification time, size) of the file when opened.
+    :ivar symbols: List of (frozen head, body offset, body size)."""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, 'rb') as file:
+            self.stamp = file_stamp(os.fstat(file.fileno()))
+            try:
+                self._map = mmap.mmap(file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+            except ValueError:
+                raise LibraryError('Empty library file: ' + file_name)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise LibraryError('Not a library file: ' + file_name)
+        start = len(MAGIC) + _SIZE.size
+        (index_size,) = _SIZE.unpack(self._map[len(MAGIC):start])
+        self._bodies = start + index_size
+        self.symbols = marshal.loads(self._map[start:self._bodies])
+
+    def signatures(self):
+        """Iterate over the (head, key) pairs, the key is the symbol index."""
+        for (key, (head, _, _)) in enumerate(self.symbols):
+            yield (thaw_sentence(head), key)
+
+    def load(self, key, scope=None):
+        """Make the Definition for a symbol, reading and thawing its body.
+
+        :param scope: The scope functions are closures over."""
+        if self._map.closed:
+            raise LibraryError('Library changed since it was imported: ' +
+                               self.file_name)
+        (head, offset, size) = self.symbols[key]
+        head = thaw_sentence(head)
+        start = self._bodies + offset
+        body = thaw_sentence(marshal.loads(self._map[start:start + size]))
+        params = list(head.iter_sub())
+        if not params:
+            return Definition(head, body)
+        ftype = FunctionType([AnythingType()] * len(params), AnythingType())
+        return Definition(head, UserFunction(params, body, scope), ftype)
+
+    def close(self):
+        """Unmap the file, bodies that were not loaded can not be after."""
+        self._map.close()
+
+
+def file_stamp(status):
+    """Get the (modification time, size) a library file is checked by."""
+    return (status.st_mtime_ns, status.st_size)
+
+
+# Path to the Library open on it.
+_open_libraries = {}
+
+
+def find_library(name, library_path):
+    """Find and open a library by name, each file is only opened once.
+
+    If the file has changed since it was opened (by its modification time
+    and size) it is opened again and the old one is closed.
+
+    :param name: The name of the library, a Sentence of words.
+    :param library_path: The directories to look in, in order."""
+    file_name = library_file_name(name)
+    for directory in library_path:
+        path = os.path.abspath(os.path.join(directory, file_name))
+        try:
+            status = os.stat(path)
+        except OSError:
+            continue
+        if not S_ISREG(status.st_mode):
+            continue
+        library = _open_libraries.get(path)
+        if library is not None:
+            if library.stamp == file_stamp(status):
+                return library
+            library.close()
+        library = _open_libraries[path] = Library(path)
+        return library
+    raise LibraryError('Library not found: ' + file_name)
+
+
+class ImportedLibrary:
+    """A Library imported into a scope, the source Import adds.
+
+    Each scope gets its own, so the functions are closures over it."""
+
+    def __init__(self, library, scope):
+        self.library = library
+        self.scope = scope
+
+    def signatures(self):
+        return self.library.signatures()
+
+    def load(self, key):
+        return self.library.load(key, self.scope)
+
+
+class ImportAction(Action):
+    """Add the definitions in a library to the scope."""
+
+    def __init__(self, library):
+        self.library = library
+
+    def do(self, scope):
+        scope.add_lazy_definitions(ImportedLibrary(self.library, scope))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if 2 != len(argv):
+        print('usage: library.py SOURCE LIBRARY', file=sys.stderr)
+        return 2
+    compile_library(*argv)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
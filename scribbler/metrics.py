@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Counters for the hot paths of Scribbler.
+
+While a Metrics object is enabled it is Metrics.active and the tokenizer,
+scopes and evaluator add to its counters. When none is enabled each
+counting point is a single check of Metrics.active.
+
+In Little Scribe `Show metrics.` gives the current counts."""
+
+
+import sys
+
+
+TOKENS = 'tokens produced'
+MATCHER_STEPS = 'matcher steps'
+NODES_VISITED = 'tri nodes visited'
+SCOPES_BUILT = 'scopes built'
+DEFINITIONS_SCANNED = 'definitions scanned'
+PRIMITIVE_LOOKUPS = 'primitive lookups'
+MATCH_CACHE_HITS = 'match cache hits'
+
+COUNTER_NAMES = [
+    TOKENS,
+    MATCHER_STEPS,
+    NODES_VISITED,
+    SCOPES_BUILT,
+    DEFINITIONS_SCANNED,
+    PRIMITIVE_LOOKUPS,
+    MATCH_CACHE_HITS,
+    ]
+
+
+class Metrics:
+    """A set of named counters.
+
+    :cvar active: The enabled Metrics, or None.
+    :ivar counts: Dictionary from counter name to count."""
+
+    active = None
+
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNTER_NAMES, 0)
+
+    def enable(self):
+        Metrics.active = self
+
+    def disable(self):
+        if Metrics.active is self:
+            Metrics.active = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+    def add(self, name, amount=1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def snapshot(self):
+        """Get a copy of the current counts."""
+        return dict(self.counts)
+
+    def reset(self):
+        for name in self.counts:
+            self.counts[name] = 0
+
+    def __str__(self):
+        return '\n'.join('{}: {}'.format(name, count)
+                         for (name, count) in self.counts.items())
+
+    def write_report(self, file=sys.stdout):
+        print(self, file=file)
+
+
+class MetricsReport:
+    """The value of `Show metrics.`, shows the active counts when printed."""
+
+    def __str__(self):
+        if Metrics.active is None:
+            return 'Metrics are disabled.'
+        return str(Metrics.active)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Evaluating independent paragraphs in parallel.
+
+Parsing depends on the definitions before each paragraph, so paragraphs
+are parsed (and definitions added) in order. Pure paragraphs, see
+dependency.is_pure, are handed to a process pool and everything else is
+evaluated here. Output and errors are put back in paragraph order, so the
+results are the same as running the paragraphs one at a time.
+
+Definitions are never replaced, only added, so a paragraph gives the
+same result with later definitions around. The workers are sent the
+definition paragraphs once, when they start, and rebuild the scope.
+
+Unlike run_tokens, every paragraph is parsed and every definition added
+before the error limit is checked, as the results are only known at the
+end."""
+
+
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    )
+import sys
+
+from code import (
+    Action,
+    create_built_in_scope,
+    evaluate,
+    )
+from data_io import (
+    OUTPUT_BUFFER_LINES,
+    OutputBuffer,
+    )
+from dependency import (
+    is_pure,
+    produces_definition,
+    )
+from lazy import (
+    force,
+    lazy_evaluation,
+    Thunk,
+    )
+from parse import (
+    Parser,
+    )
+from profiler import (
+    EVALUATE,
+    PARSE,
+    TOKENIZE,
+    )
+from repl import (
+    report_errors,
+    )
+from result_cache import (
+    paragraph_key,
+    )
+from scope import (
+    Scope,
+    )
+from typecheck import (
+    check_paragraph,
+    STRICT,
+    )
+
+
+# Kinds of entries in a run.
+_CACHED = 'cached'
+_ERROR = 'error'
+_LOCAL = 'local'
+_REMOTE = 'remote'
+
+
+# The scope in a worker process, see _start_worker.
+_worker_scope = None
+
+
+def _start_worker(definitions, data_files, lazy, library_path):
+    global _worker_scope
+    Thunk.enabled = lazy
+    _worker_scope = Scope(create_built_in_scope(
+        data_files=data_files, library_path=library_path))
+    for paragraph in definitions:
+        evaluate(paragraph, _worker_scope).do(_worker_scope)
+
+
+def _evaluate_remote(paragraph):
+    """Evaluate a paragraph in a worker.
+
+    :return: (True, result text) or (False, error)."""
+    try:
+        return (True, str(force(evaluate(paragraph, _worker_scope))))
+    except Exception as error:
+        return (False, error)
+
+
+class ParallelRunner:
+    """Runs streams of paragraphs, evaluating pure ones in a process pool.
+
+    Definitions are kept from one run to the next, like passing the same
+    scope to run_tokens.
+
+    :ivar scope: The scope holding every definition so far.
+    :ivar jobs: Number of worker processes.
+    :ivar result_cache: A ResultCache for the pure paragraphs, or None."""
+
+    def __init__(self, jobs, data_files=(), lazy=False, library_path=('.',),
+                 result_cache=None):
+        self.jobs = jobs
+        self.result_cache = result_cache
+        self._data_files = tuple(data_files)
+        self._lazy = lazy
+        self._library_path = tuple(library_path)
+        # The paragraphs that added definitions (or imported them) to scope.
+        self._definitions = []
+        # Only this process runs the Parallel built-ins, see dependency.
+        self.scope = Scope(create_built_in_scope(
+            data_files=data_files, jobs=jobs, library_path=library_path))
+
+    def _plan(self, tokens, type_check, timer):
+        """Parse the paragraphs and add their definitions.
+
+        :return: The list of (paragraph number, kind, value) entries and
+            a dictionary of the cache keys of remote paragraphs by number."""
+        if timer is not None:
+            tokens = timer.wrap_iter(tokens, TOKENIZE)
+        parser = Parser(tokens, None)
+        paragraphs = parser.iter_paragraph(self.scope)
+        if timer is not None:
+            paragraphs = timer.wrap_iter(paragraphs, PARSE)
+        entries = []
+        keys = {}
+        for paragraph in paragraphs:
+            number = parser.paragraph_number
+            try:
+                if type_check is not None:
+                    check_paragraph(paragraph, self.scope,
+                                    STRICT == type_check)
+                if produces_definition(paragraph, self.scope):
+                    evaluate(paragraph, self.scope).do(self.scope)
+                    self._definitions.append(paragraph)
+                elif self.result_cache is not None:
+                    key = paragraph_key(paragraph, self.scope)
+                    text = None if key is None else self.result_cache.get(key)
+                    if text is not None:
+                        entries.append((number, _CACHED, text))
+                    elif key is not None:
+                        keys[number] = key
+                        entries.append((number, _REMOTE, paragraph))
+                    else:
+                        entries.append((number, _LOCAL, paragraph))
+                elif is_pure(paragraph, self.scope):
+                    entries.append((number, _REMOTE, paragraph))
+                else:
+                    entries.append((number, _LOCAL, paragraph))
+            except Exception as error:
+                entries.append((number, _ERROR, error))
+        entries.extend((number, _ERROR, error)
+                       for (number, error) in parser.errors)
+        entries.sort(key=lambda entry: entry[0])
+        return (entries, keys)
+
+    def _iter_results(self, entries):
+        """Iterate over the (ok, result) pairs of the entries, in order."""
+        tasks = [value for (_, kind, value) in entries if _REMOTE == kind]
+        if not tasks:
+            return self._merge(entries, iter(()))
+        executor = ProcessPoolExecutor(
+            self.jobs, initializer=_start_worker,
+            initargs=(self._definitions, self._data_files, self._lazy,
+                      self._library_path))
+        chunk_size = max(1, len(tasks) // (self.jobs * 4))
+        remote = executor.map(_evaluate_remote, tasks, chunksize=chunk_size)
+        return self._merge(entries, remote, executor)
+
+    def _merge(self, entries, remote, executor=None):
+        try:
+            for (_, kind, value) in entries:
+                if _REMOTE == kind:
+                    yield next(remote)
+                elif _ERROR == kind:
+                    yield (False, value)
+                elif _CACHED == kind:
+                    yield (True, value)
+                else:
+                    yield self._evaluate_local(value)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    def _evaluate_local(self, paragraph):
+        try:
+            with lazy_evaluation(self._lazy):
+                result = force(evaluate(paragraph, self.scope))
+            if isinstance(result, Action):
+                result.do(self.scope)
+                return (True, None)
+            return (True, str(result))
+        except Exception as error:
+            return (False, error)
+
+    def run(self, tokens, output_file, error_limit=0, error_file=sys.stderr,
+            timer=None, type_check=None, buffer_lines=OUTPUT_BUFFER_LINES):
+        """Evaluate and print every paragraph in a stream of tokens.
+
+        The parameters and return value are the same as run_tokens, except
+        the timer's EVALUATE phase is the time waiting for all the results.
+
+        :raise: The first error past the error_limit."""
+        # The cache keys depend on the evaluation mode.
+        with lazy_evaluation(self._lazy):
+            (entries, keys) = self._plan(tokens, type_check, timer)
+        errors = []
+        merged = results = self._iter_results(entries)
+        if timer is not None:
+            results = timer.wrap_iter(results, EVALUATE)
+        try:
+            with OutputBuffer(output_file, buffer_lines) as output:
+                for ((number, _, _), (ok, result)) in zip(entries, results):
+                    if ok:
+                        if result is not None:
+                            output.write_line(result)
+                        if number in keys:
+                            self.result_cache.put(keys[number], result)
+                        continue
+                    if (error_limit is not None and
+                            error_limit <= len(errors)):
+                        result.paragraph_number = number
+                        raise result
+                    errors.append((number, result))
+        finally:
+            merged.close()
+            # Also when the error limit stops the run, so none are lost.
+            report_errors(errors, error_file)
+        return errors
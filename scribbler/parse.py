@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """The parser for Little Scribe."""
 
+import itertools
 import sys
 
 
@@ -33,10 +34,24 @@ class SentenceUnfinisedError(ParseError):
 class Parser:
     """This class repersents a parser.
 
-    :ivar _token_stream: TokenStream containing all unused tokens."""
-
-    def __init__(self, token_stream):
+    :ivar _token_stream: TokenStream containing all unused tokens.
+    :ivar error_limit: How many errors may be recovered from before one is
+        raised. 0 (the default) raises the first, None never raises.
+    :ivar errors: List of (paragraph number, error) pairs recovered from.
+    :ivar paragraph_number: Number of the paragraph being read, from 1.
+    :ivar arena: If not None, a SentenceArena paragraphs are moved into
+        before they are returned from iter_paragraph.
+    :ivar sentence_table: If not None, a SentenceTable every expression is
+        interned in, so identical sub-sentences are shared."""
+
+    def __init__(self, token_stream, error_limit=0, arena=None,
+                 sentence_table=None):
         self._token_stream = TokenStream(token_stream)
+        self.error_limit = error_limit
+        self.errors = []
+        self.paragraph_number = 0
+        self.arena = arena
+        self.sentence_table = sentence_table
 
     def parse_paragraph(self, scope):
         """Parse a paragraph. It is just a wrapper for now.
@@ -47,9 +62,52 @@ class Parser:
         return self.parse_expression(scope)
 
     def iter_paragraph(self, scope):
-        """Parse a series of paragraph, each one in a page."""
+        """Parse a series of paragraph, each one in a page.
+
+        Paragraphs that fail to parse are recorded and skipped, as long as
+        the error_limit allows it."""
         while self._token_stream.not_empty():
-            yield self.parse_paragraph(scope)
+            self.paragraph_number += 1
+            start = self._token_stream.mark()
+            try:
+                paragraph = self.parse_paragraph(scope)
+            except ParseError as error:
+                self.record_error(error)
+                self._resync(start)
+            else:
+                if self.arena is not None:
+                    paragraph = self.arena.add(paragraph)
+                yield paragraph
+            self._token_stream.release()
+
+    def record_error(self, error):
+        """Record an error in the current paragraph.
+
+        :raise: error, if the error_limit has been reached. Its
+            paragraph_number is set, so the report can say where it was."""
+        if (self.error_limit is not None and
+                self.error_limit <= len(self.errors)):
+            error.paragraph_number = self.paragraph_number
+            raise error
+        self.errors.append((self.paragraph_number, error))
+
+    def _resync(self, start):
+        """Skip to the next token after start that begins a paragraph.
+
+        Streams that do not mark paragraphs are skipped to the end."""
+        stream = self._token_stream
+        stream.reset(start)
+        stream.advance()
+        token = stream.peek()
+        while token is not None and not token.starts_paragraph:
+            stream.advance()
+            token = stream.peek()
+
+    def _intern(self, node):
+        """Swap node for its shared copy if there is a sentence_table."""
+        if self.sentence_table is None:
+            return node
+        return self.sentence_table.intern(node)
 
     def parse_expression(self, scope):
         """Parse an expression.
@@ -60,50 +118,67 @@ class Parser:
 
         :param scope: The scope the expression is being parsed within.
         :return: A Sentence."""
-        token = next(self._token_stream)
-        if isinstance(token, ValueToken):
+        return self._intern(self._parse_expression(scope))
+
+    def _parse_expression(self, scope):
+        stream = self._token_stream
+        token = stream.peek()
+        if token is None:
+            raise SentenceUnfinisedError('Expected a sentence, input ended.')
+        elif isinstance(token, ValueToken):
+            stream.advance()
             return Sentence([token])
         elif not isinstance(token, FirstToken):
+            stream.advance()
             raise ParseError(
                 'Cannot begin a sentence with \"' + repr(token) + '\"')
-        elif 'Define' == token.text:
-            self._token_stream.push_back(token)
-            return self.parse_definition(scope)
         node = Sentence([token])
         part_match = scope.new_matcher()
         if not part_match.next(token):
-            self._token_stream.push_back(token)
             raise ParseError('Sentence not matched.', node)
-        for token in self._token_stream:
+        stream.advance()
+        # Set once the signature of a binding sentence has been read.
+        inner_scope = None
+        token = stream.peek()
+        while token is not None:
             if isinstance(token, FirstToken):
-                self._token_stream.push_back(token)
                 if part_match.next():
-                    node.append(self.parse_expression(scope))
+                    if inner_scope is not None:
+                        node.append(self.parse_expression(inner_scope))
+                    elif part_match.is_binding():
+                        signature = self.parse_signature()
+                        node.append(signature)
+                        inner_scope = scope.new_define_scope(signature)
+                    else:
+                        node.append(self.parse_expression(scope))
                 elif node.ends_with_dot() and part_match.has_end():
                     return node
                 else:
                     raise ParseError('Sentence not matched.', node)
             elif isinstance(token, WordToken):
                 if part_match.next(token):
+                    stream.advance()
                     node.append(token)
                 elif node.ends_with_dot() and part_match.has_end():
-                    self._token_stream.push_back(token)
                     return node
                 else:
                     raise ParseError('Sentence not matched.', node)
             elif isinstance(token, PeriodToken):
+                stream.advance()
                 if part_match.has_end():
                     node.append(token)
                     return node
                 else:
                     raise ParseError('Sentence not matched.', node)
             elif isinstance(token, ValueToken):
+                stream.advance()
                 if part_match.next():
-                    node.append(Sentence([token]))
+                    node.append(self._intern(Sentence([token])))
                 else:
                     raise ParseError('Sentence not matched.', node)
             else:
                 raise ValueError('Unknown Token Kind: {}'.format(type(token)))
+            token = stream.peek()
         if isinstance(node[-1], Sentence) and part_match.has_end():
             return node
         raise ParseError('Sentence not matched.', node)
@@ -116,32 +191,32 @@ class Parser:
 
         :return: A Sentence, may be an operator sentence or might just be
             an expression."""
-        token = next(self._token_stream)
+        stream = self._token_stream
         node = Sentence()
         part_match = scope.new_matcher()
-        for token in self._token_stream:
+        token = stream.peek()
+        while token is not None:
             if isinstance(token, OperToken):
                 if part_match.next(token):
+                    stream.advance()
                     node.append(token)
-                elif part_match.end():
-                    self._token_stream.push_back(token)
+                elif part_match.has_end():
                     return node
                 else:
                     raise ParseError('Sentence not matched.', node)
             elif isinstance(token, FirstToken):
-                self._token_stream.push_back(token)
                 if part_match.next():
                     node.append(self.parse_expression(scope))
-                elif part_match.end():
+                elif part_match.has_end():
                     return node if 1 < len(node) else node[0]
                 else:
                     raise ParseError('Sentence not matched.', node)
             else:
-                self._token_stream.push_back(token)
-                if part_match.end():
+                if part_match.has_end():
                     return node
                 else:
                     raise ParseError('Sentence not matched.', node)
+            token = stream.peek()
         raise ParseError('Operator not closed')
 
     def parse_signature(self):
@@ -152,17 +227,20 @@ class Parser:
         This will use tokens from the stream, but may not empty the stream.
 
         :return: A Sentence reperesenting the sentence."""
-        token = next(self._token_stream)
+        stream = self._token_stream
+        token = next(stream)
         if not isinstance(token, FirstToken):
             raise ParseError('Invalid start of Signature: ' + str(token))
         node = Sentence([token])
-        for token in self._token_stream:
+        token = stream.peek()
+        while token is not None:
             if isinstance(token, FirstToken):
-                self._token_stream.push_back(token)
                 node.append(self.parse_signature())
             elif isinstance(token, WordToken):
+                stream.advance()
                 node.append(token)
             elif isinstance(token, PeriodToken):
+                stream.advance()
                 node.append(token)
                 return node
             elif isinstance(token, ValueToken):
@@ -170,99 +248,104 @@ class Parser:
                                  'allowed in signature.')
             else:
                 raise ValueError('Unknown Token Kind: {}'.format(type(token)))
+            token = stream.peek()
         raise ParseError('Parser.parse_signature: fell out of the loop.')
 
     def parse_definition(self, outer_scope):
         """Parse a definition from the incomming tokens.
 
-        This is technically a kind of expression, but there are a few special
-        rules that may force it to become seperate. This is temporary as it
-        is just the fastest way I can get this to work. I hope.
+        'Define Function or variable name. to be Body. .'
 
-        'Define Function or variable name. to be Body. .'"""
-        token = next(self._token_stream)
-        if 'Define' != token.text:
+        Definitions, and the other sentences that bind names, are parsed as
+        expressions: the matched Definition being binding (see
+        Definition.binding) is what makes the first sub-sentence a
+        signature."""
+        token = self._token_stream.peek()
+        if not isinstance(token, FirstToken):
             raise ParseError('Invalid start of definition: ' + str(token))
-        node = Sentence(token)
-        ptr = outer_scope.new_matcher()
-        if not ptr.next(token):
-            self._token_stream.push_back(item)
-            raise ParseError('Sentence not matched.', node)
-        inner_scope = None
-        for item in self._token_stream:
-            if isinstance(item, FirstToken):
-                self._token_stream.push_back(item)
-                if ptr.next():
-                    if inner_scope is None:
-                        signature = self.parse_signature()
-                        node.append(signature)
-                        inner_scope = outer_scope.new_define_scope(signature)
-                    else:
-                        node.append(self.parse_expression(inner_scope))
-                elif node.ends_with_dot() and ptr.has_end():
-                    return node
-                else:
-                    raise ParseError('Sentence not matched.', node)
-            elif isinstance(item, WordToken):
-                if ptr.next(item):
-                    node.append(item)
-                elif node.ends_with_dot() and ptr.has_end():
-                    self._token_stream.push_back(item)
-                    return node
-                else:
-                    raise ParseError('Sentence not matched.', node)
-            elif isinstance(item, PeriodToken):
-                if ptr.has_end():
-                    node.append(item)
-                    return node
-                else:
-                    raise ParseError('Sentence not matched.', node)
-            elif isinstance(item, ValueToken):
-                if ptr.next():
-                    node.append(Sentence(item))
-                else:
-                    raise ParseError('Sentence not matched.', node)
-            else:
-                raise TypeError('Parser.parse_definition: Unexpected type' +
-                                str(type(item)))
-        if node.ends_with_dot() and ptr.has_end():
-            return node
-        raise ParseError('Sentence not matched.', node)
+        return self.parse_expression(outer_scope)
 
 
 class TokenStream:
+    """A buffered stream of tokens read through a cursor.
+
+    Tokens are pulled from the wrapped iterator only when the cursor or a
+    peek reaches them and are kept until released, so the parser can look
+    ahead any distance and return to an earlier mark.
+
+    :ivar _buffer: Tokens read from the iterator and not yet released.
+    :ivar _base: Position in the whole stream of the first buffered token.
+    :ivar _index: Position of the cursor in the buffer."""
 
     def __init__(self, iter):
         """Create the TokenStream by wrapping around an iterator.
 
         :param iter: An iterator that returns Tokens."""
         self._iter = iter
-        self._head = None
+        self._buffer = []
+        self._base = 0
+        self._index = 0
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        if self._head is None:
-            return next(self._iter)
-        next_token = self._head
-        self._head = None
-        return next_token
+        token = self.peek()
+        if token is None:
+            raise StopIteration
+        self._index += 1
+        return token
+
+    def _fill(self, count):
+        """Make sure there are count tokens buffered past the cursor.
+
+        :return: False if the iterator ran out first, True otherwise."""
+        buffer = self._buffer
+        needed = self._index + count - len(buffer)
+        for token in itertools.islice(self._iter, needed if 0 < needed else 0):
+            buffer.append(token)
+        return self._index + count <= len(buffer)
+
+    def peek(self, offset=0):
+        """Get a token ahead of the cursor without moving it.
+
+        :param offset: How many tokens past the cursor to look.
+        :return: The Token, or None if the stream ends before it."""
+        index = self._index + offset
+        if index < len(self._buffer) or self._fill(offset + 1):
+            return self._buffer[index]
+        return None
+
+    def advance(self, count=1):
+        """Move the cursor forward over tokens that have been peeked at."""
+        if not self._fill(count):
+            raise ValueError('TokenStream.advance: Past end of stream.')
+        self._index += count
+
+    def mark(self):
+        """Get a mark for the current cursor position, see reset."""
+        return self._base + self._index
+
+    def reset(self, mark):
+        """Return the cursor to a mark made since the last release."""
+        index = mark - self._base
+        if not 0 <= index <= len(self._buffer):
+            raise ValueError('TokenStream.reset: Mark has been released.')
+        self._index = index
+
+    def release(self):
+        """Drop buffered tokens before the cursor, invalidating older marks."""
+        if self._index:
+            del self._buffer[:self._index]
+            self._base += self._index
+            self._index = 0
 
     def is_empty(self):
-        if self._head is not None:
-            return False
-        self._head = next(self._iter, None)
-        return self._head is None
+        return self.peek() is None
 
     def not_empty(self):
         return not self.is_empty()
 
-    def push_back(self, token):
-        if self._head is not None:
-            raise ValueError('TokenStream.push_back: Already has head.')
-        self._head = token
-
 
 def generate_paragraphs(base_stream, scope):
     """Iterate over paragraphs in the base_stream."""
@@ -6,6 +6,10 @@ an intrinsic value and type based on the tokens used."""
 from base_types import (
     IntegerType,
     )
+from metrics import (
+    Metrics,
+    PRIMITIVE_LOOKUPS,
+    )
 from scope import (
     Definition,
     )
@@ -20,6 +24,9 @@ def primitive_integer(sentence):
 
 
 def primitive_lookup(sentence):
+    metrics = Metrics.active
+    if metrics is not None:
+        metrics.add(PRIMITIVE_LOOKUPS)
     if not sentence.is_primitive():
         raise Exception('May not translate non-primitive.')
     elif isinstance(sentence[0], IntegerToken):
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Profiling Little Scribe programs.
+
+A Profiler attributes time to the Little Scribe Definitions being called,
+rather than to the Python functions that run them. Tokenizing, parsing,
+type checking and evaluating are attributed to the TOKENIZE, PARSE,
+TYPE_CHECK and EVALUATE phases.
+
+While a Profiler is enabled it is Profiler.active, evaluate checks that on
+each call so profiling costs almost nothing when it is off."""
+
+
+import sys
+import time
+
+from tokenization import (
+    PeriodToken,
+    Token,
+    )
+
+
+EVALUATE = '<evaluate>'
+PARSE = '<parse>'
+TOKENIZE = '<tokenize>'
+TYPE_CHECK = '<type check>'
+
+
+def signature_text(sentence):
+    """Write out a Sentence in full, including its sub-sentences."""
+    text = ''
+    for item in sentence:
+        if isinstance(item, Token):
+            word = str(item)
+        else:
+            word = signature_text(item)
+        if '' == text:
+            text = word
+        elif isinstance(item, PeriodToken) and not text.endswith('.'):
+            text = text + word
+        else:
+            text = text + ' ' + word
+    return text
+
+
+class Profiler:
+    """Collects call counts and times for Definitions and phases.
+
+    Frames are keyed by Definition (or phase name) while running, they are
+    only converted to signature text when results are read out.
+
+    :cvar active: The enabled Profiler, or None.
+    :ivar stats: Dictionary from frame key to [calls, inclusive, exclusive].
+    :ivar stacks: Dictionary from tuple of frame keys to exclusive time."""
+
+    active = None
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.stats = {}
+        self.stacks = {}
+        self._frames = []
+        self._depths = {}
+
+    def enable(self):
+        Profiler.active = self
+
+    def disable(self):
+        if Profiler.active is self:
+            Profiler.active = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+    def enter(self, key):
+        """Start a frame for key (a Definition or phase name)."""
+        self._depths[key] = self._depths.get(key, 0) + 1
+        self._frames.append([key, self._clock(), 0.0])
+
+    def exit(self):
+        """End the most recent frame."""
+        stack = tuple(frame[0] for frame in self._frames)
+        (key, start, child_time) = self._frames.pop()
+        elapsed = self._clock() - start
+        exclusive = elapsed - child_time
+        stat = self.stats.get(key)
+        if stat is None:
+            stat = self.stats[key] = [0, 0.0, 0.0]
+        stat[0] += 1
+        stat[2] += exclusive
+        # Recursive calls are already inside the outermost frame's time.
+        self._depths[key] -= 1
+        if 0 == self._depths[key]:
+            stat[1] += elapsed
+        if self._frames:
+            self._frames[-1][2] += elapsed
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + exclusive
+
+    def wrap_iter(self, iterator, key):
+        """Wrap an iterator so the time to get each item goes to key."""
+        iterator = iter(iterator)
+        while True:
+            self.enter(key)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.exit()
+            yield item
+
+    @staticmethod
+    def _key_name(key):
+        if isinstance(key, str):
+            return key
+        return signature_text(key.name)
+
+    def results(self):
+        """Get the results grouped by signature text.
+
+        :return: A list of (name, calls, inclusive, exclusive) tuples,
+            slowest inclusive time first."""
+        grouped = {}
+        for (key, (calls, inclusive, exclusive)) in self.stats.items():
+            total = grouped.setdefault(self._key_name(key), [0, 0.0, 0.0])
+            total[0] += calls
+            total[1] += inclusive
+            total[2] += exclusive
+        return sorted(((name,) + tuple(total)
+                       for (name, total) in grouped.items()),
+                      key=lambda row: row[2], reverse=True)
+
+    def write_report(self, file=sys.stdout):
+        """Write the results as a table."""
+        print('{:>8} {:>12} {:>12}  {}'.format(
+            'calls', 'inclusive', 'exclusive', 'definition'), file=file)
+        for (name, calls, inclusive, exclusive) in self.results():
+            print('{:>8} {:12.6f} {:12.6f}  {}'.format(
+                calls, inclusive, exclusive, name), file=file)
+
+    def write_collapsed(self, file=sys.stdout):
+        """Write the stacks in the collapsed format used by flamegraph.pl.
+
+        Each line is the frames seperated by ';' then the exclusive time
+        in microseconds."""
+        grouped = {}
+        for (stack, seconds) in self.stacks.items():
+            line = ';'.join(self._key_name(key).replace(';', ',')
+                            for key in stack)
+            grouped[line] = grouped.get(line, 0.0) + seconds
+        for (line, seconds) in sorted(grouped.items()):
+            print('{} {}'.format(line, int(round(seconds * 1000000))),
+                  file=file)
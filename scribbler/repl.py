@@ -4,45 +4,172 @@
 This is still a sketch, I have very little idea of what I'm doing."""
 
 
-from contextlib import (
-    contextmanager,
-    )
+import sys
 
 from code import (
     Action,
     create_built_in_scope,
     evaluate,
     )
+from data_io import (
+    OUTPUT_BUFFER_LINES,
+    OutputBuffer,
+    )
+from lazy import (
+    force,
+    lazy_evaluation,
+    )
 from parse import (
     Parser,
     )
+from profiler import (
+    EVALUATE,
+    PARSE,
+    TOKENIZE,
+    TYPE_CHECK,
+    )
 from scope import (
     Scope,
     )
 from tokenization import (
     file_token_stream,
+    open_token_stream,
     )
 
 
-def repl_core(input_file, output_file):
-    base_scope = create_built_in_scope()
-    scope = Scope(base_scope)
-    parser = Parser(file_token_stream(input_file))
-    for paragraph in parser.iter_paragraph(scope):
-        result = evaluate(paragraph, scope)
-        if isinstance(result, Action):
-            result.do(scope)
-        else:
-            print(result, file=output_file)
+def repl_core(input_file, output_file, error_limit=0, error_file=sys.stderr,
+              profiler=None, type_check=None, lazy=False, data_files=(),
+              scope=None, timer=None, buffer_lines=OUTPUT_BUFFER_LINES,
+              result_cache=None):
+    """Read, evaluate and print every paragraph in the input file.
+
+    :param input_file: The name of the file to read, or an open file.
+    :param error_limit: Number of paragraphs with errors to skip before
+        giving up, None for no limit. See Parser.
+    :param error_file: Where skipped errors are reported.
+    :param profiler: A Profiler to enable while running, or None.
+    :param type_check: None to skip type checking, typecheck.INFER to check
+        each paragraph before it is evaluated, or typecheck.STRICT to also
+        treat a badly typed paragraph as an error.
+    :param lazy: If true arguments are only evaluated when they are used.
+    :param data_files: Names of the files the program may read and write.
+        See create_built_in_scope.
+    :param scope: The Scope to run in, so definitions can be carried over
+        from one file to the next. If None a new one is created.
+    :param timer: A Profiler that times the phases (see run_tokens) but is
+        not enabled, so Definitions are not timed.
+    :param buffer_lines: Lines of output held before they are written.
+    :param result_cache: A ResultCache to look up and store the results of
+        pure paragraphs in, or None.
+    :return: List of (paragraph number, error) pairs that were skipped."""
+    if scope is None:
+        scope = Scope(create_built_in_scope(data_files=data_files))
+    if isinstance(input_file, str):
+        tokens = file_token_stream(input_file)
+    else:
+        tokens = open_token_stream(input_file)
+    if timer is None:
+        timer = profiler
+    with lazy_evaluation(lazy):
+        if profiler is not None:
+            with profiler:
+                return run_tokens(tokens, scope, output_file, error_limit,
+                                  error_file, timer, type_check, buffer_lines,
+                                  result_cache)
+        return run_tokens(tokens, scope, output_file, error_limit,
+                          error_file, timer, type_check, buffer_lines,
+                          result_cache)
+
+
+def run_tokens(tokens, scope, output_file, error_limit=0,
+               error_file=sys.stderr, timer=None, type_check=None,
+               buffer_lines=OUTPUT_BUFFER_LINES, result_cache=None):
+    """Evaluate and print every paragraph in a stream of tokens.
+
+    The work of repl_core, without setting up the scope or evaluation mode.
+    If timer is given the time spent in each phase (TOKENIZE, PARSE,
+    TYPE_CHECK and EVALUATE) is added to it. Results found in the
+    result_cache are printed without evaluating the paragraph."""
+    if timer is not None:
+        tokens = timer.wrap_iter(tokens, TOKENIZE)
+    parser = Parser(tokens, error_limit)
+    paragraphs = parser.iter_paragraph(scope)
+    if timer is not None:
+        paragraphs = timer.wrap_iter(paragraphs, PARSE)
+    # Only needed in these modes, so they are not loaded on start up.
+    if type_check is not None:
+        from typecheck import (
+            check_paragraph,
+            STRICT,
+            )
+    if result_cache is not None:
+        from result_cache import (
+            paragraph_key,
+            )
+    try:
+        with OutputBuffer(output_file, buffer_lines) as output:
+            for paragraph in paragraphs:
+                try:
+                    if type_check is not None:
+                        if timer is not None:
+                            timer.enter(TYPE_CHECK)
+                        try:
+                            check_paragraph(paragraph, scope,
+                                            STRICT == type_check)
+                        finally:
+                            if timer is not None:
+                                timer.exit()
+                    key = None
+                    if result_cache is not None:
+                        key = paragraph_key(paragraph, scope)
+                        text = None if key is None else result_cache.get(key)
+                        if text is not None:
+                            output.write_line(text)
+                            continue
+                    if timer is not None:
+                        timer.enter(EVALUATE)
+                    try:
+                        result = force(evaluate(paragraph, scope))
+                    finally:
+                        if timer is not None:
+                            timer.exit()
+                    if isinstance(result, Action):
+                        result.do(scope)
+                    else:
+                        output.write_line(result)
+                        if key is not None:
+                            result_cache.put(key, str(result))
+                except Exception as error:
+                    parser.record_error(error)
+    finally:
+        # Also when the error limit stops the run, so none are lost.
+        report_errors(parser.errors, error_file)
+    return parser.errors
+
+
+def error_message(number, error):
+    """Get the report of an error, number is its paragraph or None."""
+    message = error.args[0] if error.args else error
+    if number is None:
+        return 'Error: {}'.format(message)
+    return 'Error in paragraph {}: {}'.format(number, message)
+
+
+def report_errors(errors, error_file):
+    """Print each of a list of (paragraph number, error) pairs."""
+    for (number, error) in errors:
+        print(error_message(number, error), file=error_file)
 
 
 def repl_file(input_file_name, output_file_name):
     with open(input_file_name) as input_file:
-        with open(output_file_name) as output_file:
+        with open(output_file_name, 'w') as output_file:
             repl(input_file, output_file)
 
 
 def repl(input, output):
+    # Only needed here, so it is not loaded on start up.
+    from contextlib import contextmanager
 
     @contextmanager
     def force_to_stream(xput, mode='r'):
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""A result cache for pure paragraphs, kept on disk from one run to the next.
+
+A pure paragraph (see dependency.is_pure) gives the same result every time
+it is evaluated with the same definitions. So its result is stored under a
+key made from the paragraph and a content hash of every Definition it may
+read, which dependency.paragraph_reads finds through the bodies of the
+functions it calls. Changing any of those definitions changes the key.
+
+Each result is a file, named by its key, holding the printed text. Once
+the files are larger than the size limit the least recently used ones
+are removed."""
+
+
+import functools
+import hashlib
+import marshal
+import os
+import tempfile
+import time
+
+from dependency import (
+    paragraph_reads,
+    produces_definition,
+    )
+from lazy import (
+    Thunk,
+    )
+from sentence import (
+    freeze_sentence,
+    Sentence,
+    )
+
+
+# Change this when the keys or files change, so old results are not used.
+CACHE_FORMAT = 2
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+RESULT_SUFFIX = '.result'
+TEMP_SUFFIX = '.tmp'
+# Temporary files older than this (in seconds) were left by a failed run.
+TEMP_AGE = 60 * 60
+
+
+def _hash(value):
+    return hashlib.sha256(marshal.dumps(value)).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def source_hash():
+    """Get a hash of Scribbler's own source files.
+
+    It is part of every key, so results are not used by another version of
+    the built-ins or of anything they call."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            with open(os.path.join(directory, name), 'rb') as file:
+                digest.update(name.encode('utf-8') + b'\0' + file.read())
+    return digest.hexdigest()
+
+
+def _python_content(code):
+    """Get the contents of a Python code object, without its line numbers."""
+    return (code.co_code, code.co_names, tuple(
+        _python_content(const) if hasattr(const, 'co_code')
+        else _value_content(const) for const in code.co_consts))
+
+
+def _value_content(value):
+    """Get the contents of a value used by a built-in, as something marshal
+    takes. Built-ins are Python functions, so the values they close over
+    (like the integer width) are part of them."""
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return value
+    if isinstance(value, (tuple, list, frozenset)):
+        return (type(value).__name__,) + tuple(
+            _value_content(item) for item in value)
+    if isinstance(value, Sentence):
+        return ('sentence', freeze_sentence(value))
+    body = getattr(value, 'body', None)
+    if body is not None:
+        return ('function', tuple(freeze_sentence(param)
+                                  for param in value.params),
+                freeze_sentence(body))
+    function = getattr(value, '__code__', None)
+    if function is not None:
+        return ('built-in', value.__qualname__, _python_content(function),
+                tuple(_value_content(cell.cell_contents)
+                      for cell in value.__closure__ or ()))
+    kind = type(value)
+    return ('value', kind.__module__, kind.__qualname__,
+            getattr(value, '__module__', None),
+            getattr(value, '__qualname__', None))
+
+
+def definition_hash(definition):
+    """Get the content hash of a Definition, its head and code."""
+    return _hash((freeze_sentence(definition.name),
+                  _value_content(definition.code)))
+
+
+def paragraph_key(paragraph, scope):
+    """Get the cache key of a paragraph evaluated in scope, in the current
+    evaluation mode: lazy evaluation can give a result where eager
+    evaluation fails.
+
+    :return: The key, or None if the paragraph is not pure."""
+    if produces_definition(paragraph, scope):
+        return None
+    reads = paragraph_reads(paragraph, scope)
+    if not all(definition.pure for definition in reads):
+        return None
+    return _hash((CACHE_FORMAT, source_hash(), Thunk.enabled,
+                  freeze_sentence(paragraph),
+                  tuple(sorted(definition_hash(definition)
+                               for definition in reads))))
+
+
+class ResultCache:
+    """The results of pure paragraphs, stored in a directory.
+
+    :ivar directory: Where the results are stored, created if needed.
+    :ivar max_bytes: Size the results are kept under.
+    :ivar hits: Number of results found."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        os.makedirs(directory, exist_ok=True)
+        self._remove_old_temps()
+        self._size = sum(size for (_, _, size) in self._iter_entries())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + RESULT_SUFFIX)
+
+    def _iter_entries(self):
+        """Iterate over the (last used time, path, size) of each result."""
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(RESULT_SUFFIX):
+                    stat = entry.stat()
+                    yield (stat.st_mtime, entry.path, stat.st_size)
+
+    def _remove_old_temps(self):
+        """Remove temporary files left by runs that failed part way."""
+        limit = time.time() - TEMP_AGE
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if (entry.name.endswith(TEMP_SUFFIX) and
+                        entry.stat().st_mtime < limit):
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+    def get(self, key):
+        """Get the result text stored under key, or None if there is none."""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as file:
+                text = file.read()
+        except FileNotFoundError:
+            return None
+        # Mark it as used, so it is the last to be removed.
+        os.utime(path)
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        """Store the result text under key."""
+        data = text.encode('utf-8')
+        path = self._path(key)
+        try:
+            old_size = os.stat(path).st_size
+        except FileNotFoundError:
+            old_size = 0
+        (handle, temp_path) = tempfile.mkstemp(suffix=TEMP_SUFFIX,
+                                               dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                file.write(data)
+            # Replaced whole, so another run never reads part of a result.
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._size += len(data) - old_size
+        if self.max_bytes < self._size:
+            self.evict()
+
+    def evict(self):
+        """Remove the least recently used results until under max_bytes."""
+        entries = sorted(self._iter_entries())
+        self._size = sum(size for (_, _, size) in entries)
+        for (_, path, size) in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
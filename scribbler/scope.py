@@ -5,10 +5,19 @@ This includes the actual Definitions and tools for creating and manuplating
 both classes."""
 
 
+import collections
 import enum
 import itertools
 import sys
-
+import weakref
+
+from metrics import (
+    DEFINITIONS_SCANNED,
+    MATCH_CACHE_HITS,
+    MATCHER_STEPS,
+    Metrics,
+    NODES_VISITED,
+    )
 from sentence import (
     Sentence,
     )
@@ -24,24 +33,163 @@ class ScopeFault(Exception):
     """Internal Error: Scope is behaving inconsistantly."""
 
 
+DEFAULT_CACHE_SIZE = 1024
+
+
+class LazyDefinitions:
+    """Definitions made from a source as they are matched.
+
+    The source has signatures(), which gives (signature, key) pairs, and
+    load(key), which makes the Definition for a key. Only the most recently
+    used cache_size Definitions are kept, others are made again if needed.
+
+    :ivar scope: The Scope the definitions are in.
+    :ivar loads: How many times a Definition has been made."""
+
+    def __init__(self, source, cache_size=DEFAULT_CACHE_SIZE, scope=None):
+        self.source = source
+        self.cache_size = cache_size
+        self.scope = scope
+        self.loads = 0
+        self._cache = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, key):
+        """Get the Definition for key, making it if it is not kept."""
+        definition = self._cache.get(key)
+        if definition is not None:
+            self._cache.move_to_end(key)
+            return definition
+        definition = self.source.load(key)
+        definition._scope = self.scope
+        self.loads += 1
+        self._cache[key] = definition
+        if self.cache_size is not None and self.cache_size < len(self._cache):
+            self._cache.popitem(last=False)
+        return definition
+
+    def load_all(self):
+        """Get every Definition from the source, in order."""
+        return [self.get(key) for (_, key) in self.source.signatures()]
+
+
 class Scope:
-    """Repersents a collection of definitions in Little Scribe."""
+    """Repersents a collection of definitions in Little Scribe.
+
+    Definitions are either added as they are, or from a source as keys in
+    the tree, see add_lazy_definitions.
+
+    Each scope has a version, taken from a clock shared by all scopes, that
+    is moved forward every time it gains definitions. The version of what
+    is visible in a scope (see version) is the highest in its scope list,
+    so it goes up when the scope or any scope around it changes.
 
-    def __init__(self, parent=None):
+    :cvar _clock: Gives every change to any scope a new, higher, version."""
+
+    _clock = itertools.count(1)
+
+    def __init__(self, parent=None, compiled=None):
         """Create a new scope.
 
         :param parent: If this is a top level scope, parent should be None,
             if not than it should be another scope instance, repersenting
-            the lowest level scope this one is nested within."""
+            the lowest level scope this one is nested within.
+        :param compiled: If true, matchers run on an Automaton built from
+            all visible definitions. If None it is taken from the parent."""
         if parent is not None and not isinstance(parent, Scope):
             raise TypeError("Scope's parent must be None or another Scope.")
         self._parent = parent
         self._definitions = []
+        self._lazy_sources = []
         self._root = Scope._Node()
+        self._version = 0
+        # Callbacks for changes, only made if there are any.
+        self._subscribers = None
+        # Nested scopes with subscribers, held weakly so a scope that is
+        # no longer used does not stay alive just to be told of changes.
+        self._nested_subscribers = None
+        if compiled is None:
+            compiled = parent is not None and parent._compiled
+        self._compiled = compiled
+        self._automaton = None
+        self._automaton_version = None
 
     def new_matcher(self):
         """Return an object that can be used to match definitions."""
-        return Scope.Matcher(self._build_scope_list())
+        scope_list = self._build_scope_list()
+        if self._compiled:
+            return Scope.CompiledMatcher(self._get_automaton(scope_list))
+        return Scope.Matcher(scope_list)
+
+    def _get_automaton(self, scope_list):
+        """Get the Automaton for this scope, rebuilding it if any visible
+        scope has gained definitions since it was last built."""
+        version = self.version()
+        if self._automaton is None or version != self._automaton_version:
+            self._automaton = Scope.Automaton(scope_list)
+            self._automaton_version = version
+        return self._automaton
+
+    def version(self):
+        """Get the version of everything visible in this scope.
+
+        It never goes down and goes up whenever this scope or any scope it
+        is nested within gains definitions."""
+        version = self._version
+        parent = self._parent
+        while parent is not None:
+            if version < parent._version:
+                version = parent._version
+            parent = parent._parent
+        return version
+
+    def changed_since(self, version):
+        """Check if anything visible here has changed since version."""
+        return version < self.version()
+
+    def subscribe(self, callback):
+        """Call callback(scope) whenever a scope visible here changes, with
+        the scope that changed.
+
+        Changes to scopes nested within this one are not reported. The
+        callback is kept by this scope only."""
+        if self._subscribers is None:
+            self._subscribers = []
+        self._subscribers.append(callback)
+        parent = self._parent
+        while parent is not None:
+            if parent._nested_subscribers is None:
+                parent._nested_subscribers = weakref.WeakSet()
+            parent._nested_subscribers.add(self)
+            parent = parent._parent
+
+    def unsubscribe(self, callback):
+        """Stop calling a callback passed to subscribe, if it was."""
+        if not self._subscribers or callback not in self._subscribers:
+            return
+        self._subscribers.remove(callback)
+        if self._subscribers:
+            return
+        parent = self._parent
+        while parent is not None:
+            if parent._nested_subscribers is not None:
+                parent._nested_subscribers.discard(self)
+            parent = parent._parent
+
+    def invalidate(self):
+        """Mark this scope as changed, every add to the scope does this.
+
+        This moves the scope, and every scope nested within it, to a new
+        version and tells the subscribers, here and in nested scopes."""
+        self._version = next(Scope._clock)
+        listeners = [self]
+        if self._nested_subscribers is not None:
+            listeners.extend(self._nested_subscribers)
+        for listener in listeners:
+            for callback in list(listener._subscribers or ()):
+                callback(self)
 
     def _build_scope_list(self):
         """Return a list of all scopes visible in this scope."""
@@ -51,14 +199,53 @@ class Scope:
         scope_list.append(self)
         return scope_list
 
+    def definition_layers(self, stop=None, only=None):
+        """Get the Definitions of each scope visible here, outermost first.
+
+        :param stop: Leave out this scope and all the scopes around it.
+        :param only: If given, a list of Definitions to sort into layers
+            instead of every one, so lazy definitions are not all made.
+            Those that are not in a layer are left out."""
+        layers = []
+        for scope in reversed(self._build_scope_list()):
+            if scope is stop:
+                break
+            if only is not None:
+                layers.append([
+                    definition for definition in only
+                    if getattr(definition, '_scope', None) is scope])
+            else:
+                layers.append(scope._definitions + [
+                    definition for lazy in scope._lazy_sources
+                    for definition in lazy.load_all()])
+        layers.reverse()
+        return layers
+
     def _iter_definitions(self):
         for scope in self._build_scope_list():
             for definition in scope._definitions:
                 yield definition
 
     def _add_to_tree(self, definition):
+        node = self._tree_node(definition.name, True)
+        if node.has_definition():
+            raise ScopeFault('New definition would conflict.')
+        node.definition = definition
+        if definition.binding:
+            # Mark where the signature ends, so the parser knows to read
+            # the rest with the names in it.
+            for (index, item) in enumerate(definition.name):
+                if isinstance(item, Sentence):
+                    self._tree_node(definition.name[:index + 1]).binding = True
+                    break
+
+    def _tree_node(self, name, create=False):
+        """Get the tri node for a signature.
+
+        :param create: If true missing nodes are added, otherwise None is
+            returned if there is no node."""
         node = self._root
-        for item in definition.name:
+        for item in name:
             if isinstance(item, PeriodToken):
                 break
             elif isinstance(item, Token):
@@ -67,31 +254,79 @@ class Scope:
                         node = n
                         break
                 else:
+                    if not create:
+                        return None
                     new_node = Scope._Node()
                     node.tokens.append( (item, new_node) )
                     node = new_node
             elif isinstance(item, Sentence):
                 if node.sub_node is None:
+                    if not create:
+                        return None
                     node.sub_node = Scope._Node()
                 node = node.sub_node
             else:
                 raise ScopeFault('Sentence with illegial child type.')
-        if node.definition is not None:
-            raise ScopeFault('New definition would conflict.')
-        node.definition = definition
+        return node
+
+    def _has_tree_conflict(self, name, lazy_only=False):
+        """Check the tris of the visible scopes for a definition of name.
+
+        :param lazy_only: Only look for lazy definitions."""
+        for scope in self._build_scope_list():
+            if lazy_only and not scope._lazy_sources:
+                continue
+            node = scope._tree_node(name)
+            if node is not None and (node.lazy is not None or (
+                    not lazy_only and node.definition is not None)):
+                return True
+        return False
 
     def add_definition(self, definition):
         """Add a new definition to the scope.
 
         It must not conflict with any existing definition in the scope."""
+        metrics = Metrics.active
+        if metrics is not None:
+            metrics.add(DEFINITIONS_SCANNED, sum(
+                len(scope._definitions) for scope in self._build_scope_list()))
         for existing in self._iter_definitions():
             if existing.is_match(definition):
                 raise ValueError('New definition conflicts with existing '
                                  'definition in scope.')
         else:
+            if self._has_tree_conflict(definition.name, lazy_only=True):
+                raise ValueError('New definition conflicts with existing '
+                                 'definition in scope.')
             self._definitions.append(definition)
             self._add_to_tree(definition)
             definition._scope = self
+            self.invalidate()
+
+    def add_lazy_definitions(self, source, cache_size=DEFAULT_CACHE_SIZE):
+        """Add definitions that are only made when they are matched.
+
+        Only the signature goes in the tree, with the key to load it by.
+
+        :param source: Where the definitions come from, see LazyDefinitions.
+        :param cache_size: Number of made Definitions to keep, None to keep
+            all of them.
+        :return: The LazyDefinitions that hold the made Definitions."""
+        lazy = LazyDefinitions(source, cache_size, self)
+        entries = list(source.signatures())
+        for (signature, _) in entries:
+            if self._has_tree_conflict(signature):
+                raise ValueError('New definition conflicts with existing '
+                                 'definition in scope.')
+        for (signature, key) in entries:
+            node = self._tree_node(signature, True)
+            if node.has_definition():
+                raise ValueError('Source has conflicting definitions.')
+            node.lazy = lazy
+            node.key = key
+        self._lazy_sources.append(lazy)
+        self.invalidate()
+        return lazy
 
     def merge(self, other):
         """Merge another Scope into this one."""
@@ -107,21 +342,83 @@ class Scope:
             else:
                 # This is adding to the same list its reading from.
                 self._definitions.append(definition)
+        self.invalidate()
+
+    def _sees_unshadowed(self, scope, sentence):
+        """Check if scope is this scope or one it is nested within, and no
+        scope in between has a definition for sentence to shadow it."""
+        visible = self
+        while visible is not None:
+            if visible is scope:
+                return True
+            node = visible._tree_node(sentence)
+            if node is not None and node.has_definition():
+                return False
+            visible = visible._parent
+        return False
 
     def match_sentence(self, sentence):
-        """Get the definition that matches the Sentence."""
+        """Get the definition that matches the Sentence.
+
+        The match is kept on the Sentence (an inline cache, for call sites
+        that are evaluated again and again) with the scope it was found in
+        and that scope's version. It is used again, without matching, from
+        any scope that can see that scope if it has not gained definitions.
+        A scope in between may still hide it, if it had its definition
+        first (see Matcher), so those are checked. In practice these are
+        small: the scopes of parameters.
+
+        Both are weak references: a parameter's scope and Definition (and so
+        the argument) only live as long as the call."""
+        cache = sentence.match_cache
+        if cache is not None:
+            (owner_ref, version, definition_ref) = cache
+            owner = owner_ref()
+            definition = definition_ref()
+            if (owner is not None and definition is not None and
+                    version == owner._version and
+                    self._sees_unshadowed(owner, sentence)):
+                metrics = Metrics.active
+                if metrics is not None:
+                    metrics.add(MATCH_CACHE_HITS)
+                return definition
+        definition = self._match_sentence(sentence)
+        owner = getattr(definition, '_scope', None)
+        if owner is not None:
+            sentence.match_cache = (weakref.ref(owner), owner._version,
+                                    weakref.ref(definition))
+        return definition
+
+    def _match_sentence(self, sentence):
+        ptr = self._run_matcher(sentence)
+        definition = None if ptr is None else ptr.has_end()
+        if definition is not None:
+            return definition
+        raise NoDefinitionError('Sentence has no match in scope: \'' +
+            str(sentence) + "'")
+
+    def _run_matcher(self, sentence):
+        """Get a matcher that has read sentence, None if it did not match
+        every part of it."""
         ptr = self.new_matcher()
         for item in sentence:
             if isinstance(item, PeriodToken):
                 break
             elif isinstance(item, Token):
-                ptr.next(item)
+                advanced = ptr.next(item)
             else:
-                ptr.next()
-        if ptr.has_end():
-            return ptr.has_end()
-        raise NoDefinitionError('Sentence has no match in scope: \'' +
-            str(sentence) + "'")
+                advanced = ptr.next()
+            if not advanced:
+                return None
+        return ptr
+
+    def match_candidates(self, sentence):
+        """Get every Definition that matches the Sentence, in order of
+        priority: the one in the innermost scope first.
+
+        Unlike match_sentence this never raises, or uses the match cache."""
+        ptr = self._run_matcher(sentence)
+        return [] if ptr is None else ptr.candidates()
 
     def new_define_scope(self, signature):
         """Make a subscope as required by the Define keyword."""
@@ -131,17 +428,34 @@ class Scope:
         return inner_scope
 
     class _Node:
-        """Internal class used in constructing a tri, to store definions."""
+        """Internal class used in constructing a tri, to store definions.
+
+        Nodes for lazy definitions have lazy (the LazyDefinitions) and key
+        set instead of definition. Nodes reached by the signature of a
+        binding definition have binding set."""
+
+        lazy = None
+        key = None
+        binding = False
 
         def __init__(self):
             self.sub_node = None
             self.tokens = []
             self.definition = None
 
+        def has_definition(self):
+            return self.definition is not None or self.lazy is not None
+
+        def get_definition(self):
+            """Get the Definition that ends here, making it if it is lazy."""
+            if self.lazy is not None:
+                return self.lazy.get(self.key)
+            return self.definition
+
         def print_tree(self, level=None, link=None, file=sys.stdout):
             next_level = (0 if level is None else level + 1)
             if link is not None:
-                cargo = ("" if self.definition is None else ' <def>')
+                cargo = (' <def>' if self.has_definition() else '')
                 print((' ' * level) + str(link) + cargo, file=file)
             if self.sub_node is not None:
                 self.sub_node.print_tree(next_level, '(SUB)', file=file)
@@ -149,15 +463,27 @@ class Scope:
                 node.print_tree(next_level, token, file=file)
 
     class Matcher:
-        """Goes through a scope's tri looking for a match."""
+        """Goes through a scope's tri looking for a match.
+
+        It follows the tri of every visible scope at once, in order of
+        priority: innermost scope first. Each tri has at most one edge per
+        token, so there is one live node per scope still matching and a
+        single pass finds every candidate."""
 
         def __init__(self, scope_list):
-            self._nodes = [scope._root for scope in scope_list]
+            self._nodes = tuple(scope._root for scope in reversed(scope_list))
 
         def next(self, element=Sentence()):
             """If element does continue the match, advance.
 
+            The parser never backtracks: when element does not continue
+            the match the Matcher is left where it was.
+
             :return: True if Matcher advanced, false otherwise."""
+            metrics = Metrics.active
+            if metrics is not None:
+                metrics.add(MATCHER_STEPS)
+                metrics.add(NODES_VISITED, len(self._nodes))
             new_nodes = []
             if isinstance(element, Sentence):
                 for node in self._nodes:
@@ -172,20 +498,149 @@ class Scope:
             else:
                 raise TypeError('Scope.Matcher.next: element unknown type.')
             if len(new_nodes):
-                self._nodes = new_nodes
+                self._nodes = tuple(new_nodes)
                 return True
             return False
 
         def has_end(self):
             """Check if a match ends here.
 
-            :return: Matched Definition if there is one, otherwise None.
+            :return: Matched Definition if there is one, otherwise None. If
+            there are several the one in the innermost scope wins.
             Definitions are always true, so this is also a predicate."""
             for node in self._nodes:
-                if node.definition:
-                    return node.definition
+                if node.has_definition():
+                    return node.get_definition()
             return None
 
+        def candidates(self):
+            """Get every Definition that ends here, highest priority first."""
+            return [node.get_definition() for node in self._nodes
+                    if node.has_definition()]
+
+        def is_binding(self):
+            """Check if the sub-sentence just read is the signature of a
+            binding definition."""
+            return any(node.binding for node in self._nodes)
+
+    class Automaton:
+        """A deterministic automaton over all the tris visible in a scope.
+
+        Each state is an integer standing for the set of tri nodes a Matcher
+        would hold. States and transitions are filled in the first time they
+        are used, after that a step is a single table lookup. The dead state
+        is -1."""
+
+        def __init__(self, scope_list):
+            self._state_ids = {}
+            self._node_sets = []
+            self._tokens = []
+            self._subs = []
+            self._accepts = []
+            self._binding = []
+            # Innermost first, as in Matcher.
+            self._add_state(tuple(
+                scope._root for scope in reversed(scope_list)))
+
+        def _add_state(self, nodes):
+            """Get the id of the state for nodes, creating it if required."""
+            if not nodes:
+                return -1
+            state = self._state_ids.get(nodes)
+            if state is None:
+                state = len(self._node_sets)
+                self._state_ids[nodes] = state
+                self._node_sets.append(nodes)
+                self._tokens.append({})
+                self._subs.append(None)
+                # The nodes are kept, so lazy definitions can be dropped.
+                self._accepts.append(tuple(
+                    node for node in nodes if node.has_definition()))
+                self._binding.append(any(node.binding for node in nodes))
+            return state
+
+        def token_step(self, state, text):
+            """Get the state after reading a token with the given text."""
+            table = self._tokens[state]
+            new_state = table.get(text)
+            if new_state is None:
+                new_nodes = []
+                for node in self._node_sets[state]:
+                    for (token, sub_node) in node.tokens:
+                        if token.text == text:
+                            new_nodes.append(sub_node)
+                            break
+                new_state = self._add_state(tuple(new_nodes))
+                table[text] = new_state
+            return new_state
+
+        def sub_step(self, state):
+            """Get the state after reading a sub-sentence."""
+            new_state = self._subs[state]
+            if new_state is None:
+                new_state = self._add_state(tuple(
+                    node.sub_node for node in self._node_sets[state]
+                    if node.sub_node))
+                self._subs[state] = new_state
+            return new_state
+
+        def accept(self, state):
+            """Get the Definition that ends at state, or None."""
+            nodes = self._accepts[state]
+            return nodes[0].get_definition() if nodes else None
+
+        def is_binding(self, state):
+            """Check if state is just after the signature of a binding
+            definition."""
+            return self._binding[state]
+
+        def candidates(self, state):
+            """Get every Definition that ends at state, highest priority
+            first."""
+            return [node.get_definition() for node in self._accepts[state]]
+
+        def __len__(self):
+            return len(self._node_sets)
+
+    class CompiledMatcher:
+        """Matcher that walks a Scope.Automaton instead of the tris."""
+
+        def __init__(self, automaton):
+            self._automaton = automaton
+            self._state = 0
+
+        def next(self, element=Sentence()):
+            """See Matcher.next."""
+            metrics = Metrics.active
+            if metrics is not None:
+                metrics.add(MATCHER_STEPS)
+            if isinstance(element, Sentence):
+                new_state = self._automaton.sub_step(self._state)
+            elif isinstance(element, Token):
+                new_state = self._automaton.token_step(
+                    self._state, element.text)
+            else:
+                raise TypeError(
+                    'Scope.CompiledMatcher.next: element unknown type.')
+            if new_state < 0:
+                return False
+            self._state = new_state
+            return True
+
+        def has_end(self):
+            """Check if a match ends here.
+
+            :return: Matched Definition if there is one, otherwise None."""
+            return self._automaton.accept(self._state)
+
+        def candidates(self):
+            """Get every Definition that ends here, highest priority first."""
+            return self._automaton.candidates(self._state)
+
+        def is_binding(self):
+            """See Matcher.is_binding."""
+            return self._automaton.is_binding(self._state)
+
     def print_list(self, file=sys.stdout):
         """Print out the list of Definitions in the Scope."""
         for define in self._definitions:
@@ -213,15 +668,35 @@ class Definition:
     :ivar name: A Sentence to match against, it is what the definition
         is for and is matched against.
     :ivar code: Object used to evaluate the function from its arguments.
+    :ivar direct: If true code is called with only the arguments, otherwise
+        the calling scope is passed in first.
+    :ivar pure: False if evaluating the definition has effects, or depends
+        on anything besides its arguments and definitions.
+    :ivar binding: If true the definition binds names, like Define: its
+        first sub-sentence is a signature and the others are parsed with
+        the names in it defined. They are all passed in unevaluated.
+    :ivar defining: If true it evaluates to an Action that adds definitions.
 
     This should be expanded in later versions. But I think this is the
     minimum required to get it working.
     """
 
-    def __init__(self, name, code, type=None):
+    def __init__(self, name, code, type=None, direct=False, pure=True,
+                 binding=False, defining=False):
         self.name = name
         self.code = code
         self.type = type
+        self.direct = direct
+        self.pure = pure
+        self.binding = binding
+        self.defining = defining
+
+    def __getstate__(self):
+        # Leave out the scope it was added to, so a Definition can be sent
+        # to another process and added to a scope there.
+        state = dict(self.__dict__)
+        state.pop('_scope', None)
+        return state
 
     @staticmethod
     def _diff_element(self_el, other_el):
@@ -6,6 +6,7 @@ import sys
 from tokenization import (
     PeriodToken,
     Token,
+    tokenify,
     ValueToken,
     )
 
@@ -14,7 +15,17 @@ class Sentence:
     """A Sentence is a Little Scribe expression.
 
     Each also repersents a node on the parse graph, and has a list of
-    Sentences and Tokens, the children of the node."""
+    Sentences and Tokens, the children of the node.
+
+    Sentences hash by structure and the hash is cached on the node, so a
+    Sentence should not be changed after it has been used as a key.
+
+    :ivar type: The type found by the type checker, None if unchecked.
+    :ivar match_cache: The last match of the Sentence, see
+        Scope.match_sentence. It is not copied or pickled."""
+
+    type = None
+    match_cache = None
 
     ChildTypes = '(Sentence, Token)'
 
@@ -23,6 +34,7 @@ class Sentence:
 
         :param init: Either None, a Token, or an interable of ChildTypes."""
         self._children = []
+        self._hash = None
         if isinstance(init, Sentence.ChildTypes):
             self._children.append(init)
         elif hasattr(init, '__iter__'):
@@ -31,6 +43,11 @@ class Sentence:
                     raise TypeError('Sentence provided with non-child type')
                 self._children.append(child)
 
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop('match_cache', None)
+        return state
+
     def __getitem__(self, index):
         return self._children[index]
 
@@ -41,16 +58,27 @@ class Sentence:
         return iter(self._children)
 
     def __eq__(self, other):
-        if len(self._children) != len(other._children):
+        if self is other:
+            return True
+        if (self._hash is not None and other._hash is not None and
+                self._hash != other._hash):
+            return False
+        if len(self) != len(other):
             return False
-        for (mine, yours) in zip(self._children, other._children):
-            if type(mine) != type(yours) or mine != yours:
+        for (mine, yours) in zip(self, other):
+            if (isinstance(mine, Token) != isinstance(yours, Token) or
+                    mine != yours):
                 return False
         return True
 
     def __ne__(self, other):
         return not self == other
 
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(tuple(self))
+        return self._hash
+
     # Two different ways to handle the seperators.
     def __str__(self):
         data = ''
@@ -86,6 +114,8 @@ class Sentence:
         """Add a new Token to the end of the Sentence."""
         if isinstance(child, Sentence.ChildTypes):
             self._children.append(child)
+            self._hash = None
+            self.match_cache = None
         else:
             raise TypeError('Sentence provided with non-child type')
 
@@ -121,3 +151,51 @@ class Sentence:
 
 
 Sentence.ChildTypes = (Sentence, Token)
+
+
+class SentenceTable:
+    """A hash-consing table, keeps one shared copy of each distinct Sentence.
+
+    Sentences are interned from the bottom up, so the children of a Sentence
+    should be interned before it is."""
+
+    def __init__(self):
+        self._sentences = {}
+
+    def __len__(self):
+        return len(self._sentences)
+
+    def __contains__(self, sentence):
+        return sentence in self._sentences
+
+    def intern(self, sentence):
+        """Get the shared Sentence equal to sentence, adding it if it is new."""
+        return self._sentences.setdefault(sentence, sentence)
+
+
+def freeze_sentence(sentence):
+    """Convert a Sentence to nested tuples of token text.
+
+    This is the form built-in signatures are written in, so they can be
+    loaded without running the tokenizer and parser."""
+    return tuple(item.text if isinstance(item, Token)
+                 else freeze_sentence(item) for item in sentence)
+
+
+_thawed_tokens = {}
+
+
+def thaw_sentence(frozen):
+    """Rebuild a Sentence from the output of freeze_sentence.
+
+    Tokens are shared between all thawed Sentences."""
+    sentence = Sentence()
+    for item in frozen:
+        if isinstance(item, tuple):
+            sentence._children.append(thaw_sentence(item))
+        else:
+            token = _thawed_tokens.get(item)
+            if token is None:
+                token = _thawed_tokens[item] = tokenify(item)
+            sentence._children.append(token)
+    return sentence
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Tests for the flat Sentence storage."""
+
+
+from unittest import TestCase
+
+from arena import (
+    SentenceArena,
+    SentenceView,
+    )
+from code import (
+    Action,
+    create_built_in_scope,
+    evaluate,
+    )
+from parse import (
+    Parser,
+    string_to_signature,
+    )
+from scope import (
+    Scope,
+    )
+from sentence import (
+    Sentence,
+    )
+from tokenization import (
+    FirstToken,
+    PeriodToken,
+    text_token_stream,
+    WordToken,
+    )
+
+
+class TestSentenceArena(TestCase):
+
+    def test_add_round_trip(self):
+        arena = SentenceArena()
+        original = string_to_signature('Define Head. to be Body. .')
+        view = arena.add(original)
+        self.assertIsInstance(view, Sentence)
+        self.assertEqual(original, view)
+        self.assertEqual(view, original)
+        self.assertEqual(6, len(view))
+        self.assertEqual(FirstToken('Head'), view[1][0])
+        self.assertEqual(PeriodToken(), view[-1])
+        self.assertEqual(3, len(arena))
+
+    def test_tokens_shared(self):
+        arena = SentenceArena()
+        first = arena.add(string_to_signature('Height of box.'))
+        second = arena.add(string_to_signature('Height of box.'))
+        self.assertIs(first[0], second[0])
+        self.assertEqual(4, len(arena.tokens))
+
+    def test_ends_with_dot(self):
+        arena = SentenceArena()
+        no_period = Sentence([FirstToken('Word')])
+        self.assertFalse(arena.add(no_period).ends_with_dot())
+        self.assertTrue(arena.add(Sentence([FirstToken('Run'),
+            string_to_signature('Short sentence.')])).ends_with_dot())
+        self.assertFalse(arena.add(Sentence([FirstToken('Run'), no_period]))
+                         .ends_with_dot())
+
+    def test_read_only(self):
+        view = SentenceArena().add(string_to_signature('Unit.'))
+        with self.assertRaises(TypeError):
+            view.append(WordToken('more'))
+
+    def test_parse_and_evaluate_views(self):
+        arena = SentenceArena()
+        scope = Scope(create_built_in_scope())
+        parser = Parser(text_token_stream(
+            'Define Double Number. . to be Add Number. to Number. '
+            'Double Add 1 to 2.'), arena=arena)
+        results = []
+        for paragraph in parser.iter_paragraph(scope):
+            self.assertIsInstance(paragraph, SentenceView)
+            result = evaluate(paragraph, scope)
+            if isinstance(result, Action):
+                result.do(scope)
+            else:
+                results.append(result)
+        self.assertEqual([6], results)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Tests for the arithmetic built-ins."""
+
+
+from unittest import TestCase
+
+from arithmetic import (
+    arithmetic_definitions,
+    wrap_integer,
+    )
+from base_types import (
+    BooleanType,
+    FunctionType,
+    IntegerType,
+    )
+from code import (
+    create_built_in_scope,
+    evaluate,
+    LSRunningError,
+    )
+from parse import (
+    Parser,
+    )
+from tokenization import (
+    text_token_stream,
+    )
+
+
+def evaluate_text(text, scope=None):
+    if scope is None:
+        scope = create_built_in_scope()
+    return evaluate(Parser(text_token_stream(text)).parse_expression(scope),
+                    scope)
+
+
+class TestArithmetic(TestCase):
+
+    def test_operations(self):
+        self.assertEqual(12, evaluate_text('Multiply 3 by 4.'))
+        self.assertEqual(3, evaluate_text('Divide 7 by 2.'))
+        self.assertEqual(1, evaluate_text('Remainder of 7 by 2.'))
+        self.assertEqual(5, evaluate_text('Minus 7 by 2.'))
+        self.assertTrue(evaluate_text('Is 2 less than 3.'))
+        self.assertFalse(evaluate_text('Is 2 greater than 3.'))
+        self.assertTrue(evaluate_text('Is Add 1 to 1. equal to 2.'))
+
+    def test_divide_by_zero(self):
+        for text in ['Divide 1 by 0.', 'Remainder of 1 by 0.']:
+            with self.assertRaises(LSRunningError):
+                evaluate_text(text)
+
+    def test_big_integers(self):
+        self.assertEqual(2 ** 64, evaluate_text(
+            'Multiply 4294967296 by 4294967296.'))
+
+    def test_fixed_width(self):
+        scope = create_built_in_scope(integer_width=8)
+        self.assertEqual(-128, evaluate_text('Add 127 to 1.', scope))
+        self.assertEqual(-1, evaluate_text('Minus 0 by 1.', scope))
+        self.assertEqual(0, evaluate_text('Multiply 16 by 16.', scope))
+        # Literals are wrapped as well as results, 200 is -56.
+        self.assertFalse(evaluate_text('Is 200 greater than 100.', scope))
+        self.assertTrue(evaluate_text('Is 128 equal to Minus 0 by 128. .',
+                                      scope))
+        self.assertEqual(-56, evaluate_text('Add 200 to 0.', scope))
+
+    def test_fixed_width_boundary(self):
+        scope = create_built_in_scope(integer_width=8)
+        # At 8 bits 128 is -128 and 255 is -1.
+        self.assertEqual(127, evaluate_text('Add 126 to 1.', scope))
+        self.assertEqual(-128, evaluate_text('Minus Minus 0 by 127. by 1.',
+                                             scope))
+        self.assertEqual(127, evaluate_text('Minus 128 by 1.', scope))
+        self.assertEqual(-128, evaluate_text('Multiply 128 by 255.', scope))
+        self.assertEqual(-128, evaluate_text('Divide 128 by 255.', scope))
+        self.assertEqual(-1, evaluate_text('Divide 255 by 1.', scope))
+        with self.assertRaises(LSRunningError):
+            evaluate_text('Divide 1 by 256.', scope)
+
+    def test_wrap_integer(self):
+        self.assertEqual(-1, wrap_integer(2 ** 32 - 1, 32))
+        self.assertEqual(2 ** 31 - 1, wrap_integer(2 ** 31 - 1, 32))
+
+    def test_definitions(self):
+        for definition in arithmetic_definitions():
+            self.assertTrue(definition.direct)
+            self.assertIsInstance(definition.type, FunctionType)
+            self.assertEqual(2, definition.type.parameter_count)
+            self.assertIsInstance(definition.type.return_type,
+                                  (IntegerType, BooleanType))
+        with self.assertRaises(ValueError):
+            arithmetic_definitions(0)
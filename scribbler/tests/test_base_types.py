@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Tests for the Little Scribe type objects."""
+
+
+from unittest import TestCase
+from unittest.mock import (
+    patch,
+    )
+
+from base_types import (
+    _subtype_cache,
+    AnythingType,
+    EmptyType,
+    FunctionType,
+    IntegerType,
+    ListType,
+    NumberType,
+    StructureType,
+    TypeType,
+    UnionType,
+    )
+
+
+class TestInterning(TestCase):
+
+    def test_same_structure_same_object(self):
+        self.assertIs(IntegerType(), IntegerType())
+        self.assertIs(ListType(IntegerType()), ListType(IntegerType()))
+        self.assertIs(FunctionType([IntegerType()], AnythingType()),
+                      FunctionType((IntegerType(),), AnythingType()))
+        self.assertIsNot(ListType(IntegerType()), ListType(NumberType()))
+
+    def test_structures_not_interned(self):
+        self.assertIsNot(StructureType([]), StructureType([]))
+
+
+class TestIsSuperOf(TestCase):
+
+    def test_subtypes(self):
+        self.assertTrue(NumberType().is_super_of(IntegerType()))
+        self.assertFalse(IntegerType().is_super_of(NumberType()))
+        self.assertTrue(ListType(NumberType()).is_super_of(EmptyType()))
+        self.assertTrue(TypeType().is_super_of(IntegerType()))
+        self.assertTrue(UnionType([IntegerType(), EmptyType()]).is_super_of(
+            UnionType([EmptyType(), IntegerType()])))
+        self.assertTrue(
+            FunctionType([IntegerType()], NumberType()).is_super_of(
+                FunctionType([NumberType()], IntegerType())))
+        self.assertFalse(
+            FunctionType([NumberType()], NumberType()).is_super_of(
+                FunctionType([IntegerType()], NumberType())))
+
+    def test_cached(self):
+        outer = ListType(ListType(NumberType()))
+        inner = ListType(ListType(IntegerType()))
+        self.assertTrue(outer.is_super_of(inner))
+        with patch.object(ListType, '_is_super_of') as mock_check:
+            self.assertTrue(outer.is_super_of(inner))
+        mock_check.assert_not_called()
+
+    def test_structures_not_cached(self):
+        structure = StructureType([])
+        self.assertTrue(AnythingType().is_super_of(structure))
+        self.assertTrue(structure.is_super_of(structure))
+        self.assertFalse(structure.is_super_of(IntegerType()))
+        self.assertFalse(any(structure in key for key in _subtype_cache))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Tests for the benchmark corpora and tools."""
+
+
+from unittest import TestCase
+
+from benchmark import (
+    call_chain_corpus,
+    compare_results,
+    definitions_corpus,
+    list_corpus,
+    nesting_corpus,
+    number_word,
+    recursion_corpus,
+    run_benchmarks,
+    )
+from code import (
+    Action,
+    create_built_in_scope,
+    evaluate,
+    ListObject,
+    )
+from lazy import (
+    force,
+    lazy_evaluation,
+    )
+from parse import (
+    Parser,
+    )
+from scope import (
+    Scope,
+    )
+from tokenization import (
+    text_token_stream,
+    WordToken,
+    )
+
+
+class TestCorpora(TestCase):
+
+    def run_corpus(self, text):
+        scope = Scope(create_built_in_scope())
+        results = []
+        for paragraph in Parser(text_token_stream(text)).iter_paragraph(scope):
+            result = evaluate(paragraph, scope)
+            if isinstance(result, Action):
+                result.do(scope)
+            else:
+                results.append(result)
+        return results
+
+    def test_number_word(self):
+        self.assertEqual('a', number_word(0))
+        self.assertEqual('ba', number_word(26))
+        WordToken(number_word(1234))
+
+    def test_definitions_corpus(self):
+        self.assertEqual(['0', '1', '2'], [str(result) for result in
+                         self.run_corpus(definitions_corpus(3))])
+
+    def test_nesting_corpus(self):
+        self.assertEqual([5], self.run_corpus(nesting_corpus(4)))
+
+    def test_call_chain_corpus(self):
+        self.assertEqual([1], self.run_corpus(call_chain_corpus(5)))
+
+    def test_recursion_corpus(self):
+        with lazy_evaluation():
+            self.assertEqual([5], [force(result) for result in
+                             self.run_corpus(recursion_corpus(5))])
+
+    def test_list_corpus(self):
+        (result,) = self.run_corpus(list_corpus(3))
+        self.assertIsInstance(result, ListObject)
+        self.assertEqual([0, 1, 2], result.to_under_list())
+
+
+class TestRunBenchmarks(TestCase):
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(scale=0.01, repeat=1, only='parse.')
+        self.assertEqual({'parse.call_chain', 'parse.definitions',
+                          'parse.list', 'parse.nesting', 'parse.recursion'},
+                         set(results['benchmarks']))
+
+    def test_compare_results(self):
+        baseline = {'benchmarks': {'a': {'seconds': 1.0},
+                                   'b': {'seconds': 1.0}}}
+        current = {'benchmarks': {'a': {'seconds': 1.05},
+                                  'b': {'seconds': 2.0},
+                                  'c': {'seconds': 1.0}}}
+        rows = compare_results(baseline, current, 0.1)
+        self.assertEqual([('a', False), ('b', True)],
+                         [(row[0], row[4]) for row in rows])
@@ -2,13 +2,36 @@
 """Tests for built in code."""
 
 
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    )
+import os
+import pickle
+import tempfile
+
 from code import (
+    bind_definitions,
     create_built_in_scope,
     define_function,
+    evaluate,
+    _function_layers,
+    _start_list_worker,
+    LSRunningError,
+    split_chunks,
+    StreamList,
+    UserFunction,
+    )
+from lazy import (
+    lazy_evaluation,
+    Thunk,
     )
 from parse import (
+    Parser,
     string_to_signature,
     )
+from profiler import (
+    signature_text,
+    )
 from scope import (
     Definition,
     Scope,
@@ -18,9 +41,13 @@ from sentence import (
     )
 from tokenization import (
     FirstToken,
+    text_token_stream,
     WordToken,
     )
 from unittest import TestCase
+from unittest.mock import (
+    patch,
+    )
 
 
 class TestDefineFunction(TestCase):
@@ -47,3 +74,204 @@ class TestCreateBuiltInScope(TestCase):
         self.assertIsInstance(scope.match_sentence(
             string_to_signature('Define Abc. to be Xyz. .')),
             Definition)
+
+    def test_binding_is_per_definition(self):
+        # Only the built-in Parallel sentences bind names.
+        scope = Scope(create_built_in_scope())
+        evaluate_text('Define Parallel lines. to be 3.', scope).do(scope)
+        self.assertEqual('3', str(evaluate_text('Parallel lines.', scope)))
+
+    def test_frozen_signatures_parse(self):
+        # The frozen built-in signatures must be what the parser would give.
+        for definition in create_built_in_scope()._definitions:
+            text = signature_text(definition.name)
+            self.assertEqual(string_to_signature(text), definition.name)
+
+
+def evaluate_text(text, scope):
+    return evaluate(Parser(text_token_stream(text)).parse_expression(scope),
+                    scope)
+
+
+class TestStreamList(TestCase):
+
+    def test_pulls_on_demand(self):
+        pulled = []
+
+        def items():
+            for item in range(3):
+                pulled.append(item)
+                yield item
+
+        stream = StreamList(items())
+        self.assertEqual([], pulled)
+        self.assertEqual(0, stream.head)
+        self.assertEqual([0], pulled)
+        self.assertEqual(1, stream.tail.head)
+        self.assertEqual([0, 1, 2], stream.to_under_list())
+        self.assertTrue(stream.tail.tail.tail.is_empty())
+
+    def test_range(self):
+        scope = create_built_in_scope()
+        self.assertEqual([2, 3, 4], evaluate_text(
+            'Range from 2 to 4.', scope).to_under_list())
+        self.assertTrue(evaluate_text('Is Range from 2 to 1. empty.',
+                                      scope))
+        self.assertEqual(3, evaluate_text(
+            'Head of Tail of Range from 2 to 4. . .', scope))
+
+    def test_count_is_infinite(self):
+        scope = create_built_in_scope()
+        self.assertEqual(1000001, evaluate_text(
+            'Head of Tail of Count from 1000000. . .', scope))
+        self.assertFalse(evaluate_text('Is Count from 0. empty.', scope))
+
+    def test_lines_of_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            name = os.path.join(directory, 'data.txt')
+            with open(name, 'w') as file:
+                file.write('first\nsecond\n')
+            scope = create_built_in_scope(data_files=[name])
+            self.assertEqual('second', evaluate_text(
+                'Head of Tail of Lines of file 1. . .', scope))
+            self.assertEqual(['first', 'second'], evaluate_text(
+                'Lines of file 1.', scope).to_under_list())
+
+    def test_integers_and_write(self):
+        with tempfile.TemporaryDirectory() as directory:
+            names = [os.path.join(directory, 'in.txt'),
+                     os.path.join(directory, 'out.txt')]
+            with open(names[0], 'w') as file:
+                file.write('3 1 4\n1 5\n')
+            scope = create_built_in_scope(data_files=names)
+            self.assertEqual(1, evaluate_text(
+                'Head of Tail of Integers of file 1. . .', scope))
+            self.assertEqual(3, evaluate_text(
+                'Write Range from 7 to 9. to file 2.', scope))
+            with open(names[1]) as file:
+                self.assertEqual('7\n8\n9\n', file.read())
+
+
+class TestParallelBuiltIns(TestCase):
+
+    def make_scope(self, jobs):
+        scope = Scope(create_built_in_scope(jobs=jobs))
+        evaluate_text('Define Double N. . to be Add N. to N.', scope).do(scope)
+        return scope
+
+    def test_map(self):
+        for jobs in (1, 2):
+            scope = self.make_scope(jobs)
+            self.assertEqual([2 * n * n for n in range(1, 21)], evaluate_text(
+                'Parallel map Square X. . over Range from 1 to 20. '
+                'to be Multiply Double X. . by X. .', scope).to_under_list())
+
+    def test_fold(self):
+        for jobs in (1, 2):
+            scope = self.make_scope(jobs)
+            self.assertEqual(5055, evaluate_text(
+                'Parallel fold Sum A. B. . over Range from 1 to 100. from 5 '
+                'to be Add A. to B. .', scope))
+
+    def test_pool_reused(self):
+        scope = self.make_scope(2)
+        with patch('concurrent.futures.ProcessPoolExecutor',
+                   wraps=ProcessPoolExecutor) as executor_mock:
+            self.assertEqual([2 * n for n in range(1, 9)], evaluate_text(
+                'Parallel map Twice X. . over Range from 1 to 8. '
+                'to be Double X. .', scope).to_under_list())
+            # The workers see definitions made after the pool started.
+            evaluate_text('Define Triple N. . to be Add N. to Double N. . .',
+                          scope).do(scope)
+            self.assertEqual([3 * n for n in range(1, 9)], evaluate_text(
+                'Parallel map Thrice X. . over Range from 1 to 8. '
+                'to be Triple X. .', scope).to_under_list())
+        self.assertEqual(1, executor_mock.call_count)
+
+    def test_map_in_function(self):
+        scope = self.make_scope(2)
+        # The parameter L. holds the list, it is not sent to the workers.
+        evaluate_text('Define Squares of L. . to be Parallel map S X. . '
+                      'over L. to be Multiply X. by X. . .', scope).do(scope)
+        evaluate_text('Define Total of L. . to be Parallel fold Sum A. B. . '
+                      'over L. from 0 to be Add A. to B. . .', scope).do(scope)
+        self.assertEqual(sum(n * n for n in range(1, 3001)), evaluate_text(
+            'Total of Squares of Range from 1 to 3000. . .', scope))
+
+    def test_function_layers(self):
+        scope = self.make_scope(2)
+        evaluate_text('Define Seven. to be 7.', scope).do(scope)
+        built_ins = scope._parent
+        local = Scope(scope)
+        local.add_definition(Definition(string_to_signature('L.'), 3))
+        body = Parser(text_token_stream('Double X. .')).parse_expression(
+            local.new_define_scope(string_to_signature('F X. .')))
+        function = UserFunction([string_to_signature('X.')], body, local)
+        # Only what the body reads is sent, not Seven or the parameter L.
+        self.assertEqual([[string_to_signature('Double N. .')], []], [
+            [definition.name for definition in layer]
+            for layer in _function_layers(function, built_ins)])
+
+    def test_lazy_workers(self):
+        # Set in each worker, as it is not copied with forkserver or spawn.
+        try:
+            _start_list_worker((None, (), 1, ('.',)), True)
+            self.assertTrue(Thunk.enabled)
+        finally:
+            Thunk.enabled = False
+        scope = self.make_scope(2)
+        with lazy_evaluation():
+            self.assertEqual(list(range(1, 41)), evaluate_text(
+                'Parallel map F X. . over Range from 1 to 40. to be If Is X. '
+                'less than 100. then X. else Head of Empty list. . . .',
+                scope).to_under_list())
+
+    def test_fold_empty(self):
+        self.assertEqual(7, evaluate_text(
+            'Parallel fold Sum A. B. . over Empty list. from 7 '
+            'to be Add A. to B. .', self.make_scope(2)))
+
+    def test_parameter_count(self):
+        with self.assertRaises(LSRunningError):
+            evaluate_text('Parallel map Pair A. B. . over Empty list. '
+                          'to be A. .', self.make_scope(1))
+
+    def test_split_chunks(self):
+        self.assertEqual([[0, 1, 2], [3, 4, 5], [6]],
+                         split_chunks(list(range(7)), 3))
+        self.assertEqual([], split_chunks([], 3))
+
+
+class TestUserFunction(TestCase):
+
+    def make_scope(self, *texts):
+        scope = Scope(create_built_in_scope())
+        for text in texts:
+            evaluate_text(text, scope).do(scope)
+        return scope
+
+    def test_same_parameter_names(self):
+        scope = self.make_scope(
+            'Define Double Number. . to be Add Number. to Number.',
+            'Define Quadruple Number. . to be Double Double Number. . .')
+        self.assertEqual(12, evaluate_text('Quadruple 3.', scope))
+
+    def test_defining_scope(self):
+        scope = self.make_scope(
+            'Define Double Number. . to be Add Number. to Number.')
+        function = scope.match_sentence(
+            string_to_signature('Double Number. .')).code
+        self.assertIs(scope, function.scope)
+        # The calling scope is not searched.
+        self.assertEqual(6, function(Scope(), 3))
+
+    def test_bind_after_pickle(self):
+        scope = self.make_scope(
+            'Define Double Number. . to be Add Number. to Number.')
+        definition = pickle.loads(pickle.dumps(scope.match_sentence(
+            string_to_signature('Double Number. .'))))
+        self.assertIsNone(definition.code.scope)
+        other = Scope(create_built_in_scope())
+        bind_definitions([definition], other)
+        self.assertIs(other, definition.code.scope)
+        self.assertEqual(8, evaluate_text('Double 4.', other))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Tests for bulk data reading and writing."""
+
+
+from io import (
+    StringIO,
+    )
+import os
+import tempfile
+from unittest import TestCase
+
+from data_io import (
+    file_integers,
+    file_lines,
+    OutputBuffer,
+    write_items,
+    )
+
+
+class TestReaders(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.name = os.path.join(self.directory.name, 'data.txt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text):
+        with open(self.name, 'w') as file:
+            file.write(text)
+
+    def test_lines_across_chunks(self):
+        self.write('alpha\nbeta\n\ngamma')
+        for size in (1, 3, 4, 100):
+            self.assertEqual(['alpha', 'beta', '', 'gamma'],
+                             list(file_lines(self.name, size)))
+
+    def test_integers_across_chunks(self):
+        self.write('12 345\n-6\n\n78 ')
+        for size in (1, 2, 3, 100):
+            self.assertEqual([12, 345, -6, 78],
+                             list(file_integers(self.name, size)))
+
+    def test_integers_reject_words(self):
+        self.write('1 two 3')
+        with self.assertRaises(ValueError):
+            list(file_integers(self.name))
+
+    def test_write_items(self):
+        self.assertEqual(3, write_items(self.name, [1, 2, 'three']))
+        self.assertEqual(['1', '2', 'three'], list(file_lines(self.name)))
+
+
+class TestOutputBuffer(TestCase):
+
+    def test_writes_in_groups(self):
+        file = StringIO()
+        with OutputBuffer(file, limit=2) as output:
+            output.write_line(1)
+            self.assertEqual('', file.getvalue())
+            output.write_line(2)
+            self.assertEqual('1\n2\n', file.getvalue())
+            output.write_line(3)
+        self.assertEqual('1\n2\n3\n', file.getvalue())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Tests for dependency analysis of paragraphs."""
+
+
+from unittest import TestCase
+
+from code import (
+    create_built_in_scope,
+    evaluate,
+    )
+from dependency import (
+    is_pure,
+    paragraph_reads,
+    produces_definition,
+    )
+from parse import (
+    Parser,
+    )
+from profiler import (
+    signature_text,
+    )
+from scope import (
+    Scope,
+    )
+from tokenization import (
+    text_token_stream,
+    )
+
+
+class TestDependency(TestCase):
+
+    def setUp(self):
+        self.scope = Scope(create_built_in_scope())
+        self.define('Define Double Number. . to be Add Number. to Number.')
+
+    def parse(self, text):
+        return Parser(text_token_stream(text)).parse_expression(self.scope)
+
+    def define(self, text):
+        evaluate(self.parse(text), self.scope).do(self.scope)
+
+    def reads(self, text):
+        return sorted(signature_text(definition.name) for definition in
+                      paragraph_reads(self.parse(text), self.scope))
+
+    def test_produces_definition(self):
+        for (expected, text) in [(True, 'Define Two. to be 2.'),
+                                 (False, 'Double 2.'), (False, '2')]:
+            self.assertEqual(expected, produces_definition(
+                self.parse(text), self.scope))
+
+    def test_reads_through_bodies(self):
+        self.assertEqual(['Add Left hand side. to Right hand side. .',
+                          'Double Number. .'],
+                         self.reads('Double 2.'))
+        self.assertEqual([], self.reads('2'))
+
+    def test_is_pure(self):
+        self.assertTrue(is_pure(self.parse('Double Add 1 to 2. .'),
+                                self.scope))
+        self.assertFalse(is_pure(self.parse('Define Two. to be 2.'),
+                                 self.scope))
+        self.assertFalse(is_pure(self.parse('Show metrics.'), self.scope))
+        self.define('Define Report X. . to be Show metrics.')
+        self.assertFalse(is_pure(self.parse('Report 1.'), self.scope))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Tests for the command line driver."""
+
+
+from io import (
+    StringIO,
+    )
+import os
+import tempfile
+from unittest import TestCase
+
+from driver import (
+    main,
+    parse_args,
+    remaining_errors,
+    )
+
+
+class TestArguments(TestCase):
+
+    def test_ignore_errors(self):
+        self.assertEqual(0, parse_args([]).error_limit)
+        self.assertIsNone(parse_args(['-i']).error_limit)
+        for argv in (['-i=3'], ['-i3'], ['--ignore-errors=3'],
+                     ['--error-limit', '3']):
+            self.assertEqual(3, parse_args(argv).error_limit)
+        args = parse_args(['-i', 'prog.ls', '--', '-i3'])
+        self.assertIsNone(args.error_limit)
+        self.assertEqual(['prog.ls', '-i3'], args.files)
+
+    def test_remaining_errors(self):
+        self.assertIsNone(remaining_errors(None, 4))
+        self.assertEqual(1, remaining_errors(3, 2))
+        self.assertEqual(0, remaining_errors(3, 5))
+
+
+class TestMain(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write(text)
+        return path
+
+    def run_main(self, argv, text=''):
+        output = StringIO()
+        errors = StringIO()
+        status = main(argv, StringIO(text), output, errors)
+        return (status, output.getvalue(), errors.getvalue())
+
+    def test_files_share_scope(self):
+        first = self.write('first.ls', 'Define Double Number. . to be Add Number. to Number.\n')
+        second = self.write('second.ls', 'Double 3.\n')
+        for jobs in ('1', '2'):
+            self.assertEqual((0, '6\n', ''), self.run_main(
+                ['-x', '--jobs', jobs, first, second]))
+
+    def test_interactive(self):
+        first = self.write('first.ls',
+            'Define Double Number. . to be Add Number. to Number.\n')
+        self.assertEqual((0, '4\n', ''), self.run_main(
+            [first], 'Double 2.\n'))
+
+    def test_errors(self):
+        bad = self.write('bad.ls', 'Nothing here.\n\n1\n')
+        (status, output, errors) = self.run_main(['-x', bad])
+        self.assertEqual(1, status)
+        self.assertEqual('', output)
+        (status, output, errors) = self.run_main(['-x', '-i', bad])
+        self.assertEqual(0, status)
+        self.assertEqual('1\n', output)
+        self.assertIn('Error in paragraph 1', errors)
+
+    def test_error_limit_reached(self):
+        bad = self.write('bad.ls',
+            'Nothing here.\n\n1\n\nNot here.\n\nOr here.\n\n2\n')
+        for jobs in ('1', '2'):
+            (status, output, errors) = self.run_main(
+                ['-x', '-i=1', '--jobs', jobs, bad])
+            self.assertEqual(1, status)
+            self.assertEqual('1\n', output)
+            self.assertEqual(['Error in paragraph 1: Sentence not matched.',
+                              'Error in paragraph 3: Sentence not matched.'],
+                             errors.splitlines())
+
+    def test_time(self):
+        first = self.write('first.ls', '1\n')
+        (status, output, errors) = self.run_main(['-x', '--time', first])
+        self.assertEqual((0, '1\n'), (status, output))
+        self.assertIn('<evaluate>', errors)
+        self.assertIn('<parse>', errors)
+
+    def test_profile(self):
+        first = self.write('first.ls',
+            'Define Double Number. . to be Add Number. to Number.\n\n'
+            'Double 2.\n')
+        (status, output, errors) = self.run_main(['-x', '--profile', first])
+        self.assertEqual((0, '4\n'), (status, output))
+        self.assertIn('Double Number. .', errors)
+        self.assertIn('<parse>', errors)
+        self.assertEqual(1, errors.count('<parse>'))
+        collapsed = os.path.join(self.directory.name, 'stacks.txt')
+        (status, output, errors) = self.run_main(
+            ['-x', '--profile-collapsed', collapsed, first])
+        self.assertEqual((0, '4\n', ''), (status, output, errors))
+        with open(collapsed) as file:
+            stacks = file.read()
+        self.assertIn('<evaluate>;Double Number. .;Add', stacks)
+
+    def test_lazy(self):
+        branches = self.write('branches.ls',
+            'If Is 1 less than 2. then 1 else Head of Empty list. .\n')
+        for jobs in ('1', '2'):
+            self.assertEqual((0, '1\n', ''), self.run_main(
+                ['-x', '--lazy', '--jobs', jobs, branches]))
+        (status, output, _) = self.run_main(['-x', branches])
+        self.assertEqual((1, ''), (status, output))
+
+    def test_type_check(self):
+        bad = self.write('bad.ls', 'Add Empty list. to 1.\n\nAdd 1 to 2.\n')
+        (status, output, errors) = self.run_main(
+            ['-x', '-i', '--type-check', 'strict', bad])
+        self.assertEqual((0, '3\n'), (status, output))
+        self.assertIn('wrong type', errors)
+        (status, output, errors) = self.run_main(
+            ['-x', '-i', '--type-check', 'infer', bad])
+        self.assertEqual((0, '3\n'), (status, output))
+        self.assertNotIn('wrong type', errors)
+
+    def test_metrics(self):
+        self.assertEqual((0, 'Metrics are disabled.\n', ''),
+                         self.run_main([], 'Show metrics.\n'))
+        (status, output, _) = self.run_main(
+            ['--metrics'], 'Add 1 to 2.\n\nShow metrics.\n')
+        self.assertEqual(0, status)
+        self.assertTrue(output.startswith('3\ntokens produced: '))
+        self.assertIn('matcher steps: ', output)
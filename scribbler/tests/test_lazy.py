@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Tests for lazy evaluation."""
+
+
+from io import (
+    StringIO,
+    )
+from unittest import TestCase
+
+from lazy import (
+    force,
+    lazy_evaluation,
+    Thunk,
+    )
+from repl import (
+    repl_core,
+    )
+
+
+class TestThunk(TestCase):
+
+    def test_force_once(self):
+        calls = []
+
+        def compute(value):
+            calls.append(value)
+            return value
+
+        thunk = Thunk(compute, 7)
+        self.assertFalse(thunk.is_forced())
+        self.assertEqual(7, force(thunk))
+        self.assertEqual(7, thunk.force())
+        self.assertTrue(thunk.is_forced())
+        self.assertEqual([7], calls)
+
+    def test_force_nested(self):
+        self.assertEqual(3, force(Thunk(Thunk, lambda: 3)))
+        self.assertEqual(4, force(4))
+
+    def test_lazy_evaluation(self):
+        self.assertFalse(Thunk.enabled)
+        with lazy_evaluation():
+            self.assertTrue(Thunk.enabled)
+        self.assertFalse(Thunk.enabled)
+
+
+class TestLazyRepl(TestCase):
+
+    def test_unused_arguments_skipped(self):
+        output = StringIO()
+        skipped = repl_core('tests/lazy-branches.ls', output, lazy=True)
+        self.assertEqual('1\n2\n3\n', output.getvalue())
+        self.assertEqual([], skipped)
+        self.assertFalse(Thunk.enabled)
+
+    def test_eager_evaluates_everything(self):
+        output = StringIO()
+        skipped = repl_core('tests/lazy-branches.ls', output,
+                            error_limit=None, error_file=StringIO())
+        self.assertEqual('', output.getvalue())
+        self.assertEqual(3, len(skipped))
+
+    def test_one_two_three(self):
+        output = StringIO()
+        repl_core('tests/one-two-three.ls', output, lazy=True)
+        self.assertEqual('1\n2\n3\n4\n5\n6\n', output.getvalue())
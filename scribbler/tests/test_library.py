@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Tests for precompiled libraries."""
+
+
+import os
+import pickle
+import tempfile
+from unittest import TestCase
+
+from code import (
+    create_built_in_scope,
+    evaluate,
+    )
+from library import (
+    compile_library,
+    find_library,
+    ImportedLibrary,
+    Library,
+    LibraryError,
+    library_file_name,
+    )
+from parse import (
+    Parser,
+    string_to_signature,
+    )
+from scope import (
+    Scope,
+    )
+from tokenization import (
+    text_token_stream,
+    )
+
+
+class TestLibrary(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'list-tools.lsl')
+        compile_library('tests/list-tools.ls', self.file_name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def evaluate_text(self, text, scope):
+        return evaluate(Parser(text_token_stream(text)).parse_expression(
+            scope), scope)
+
+    def test_file_name(self):
+        self.assertEqual('list-tools.lsl', library_file_name(
+            string_to_signature('List tools.')))
+
+    def test_symbol_index(self):
+        library = Library(self.file_name)
+        self.assertEqual(string_to_signature('Quadruple Value. .'),
+                         list(library.signatures())[1][0])
+        self.assertEqual(4, len(library.symbols))
+
+    def test_import(self):
+        scope = Scope(create_built_in_scope(
+            library_path=[self.directory.name]))
+        self.evaluate_text('Import List tools. .', scope).do(scope)
+        self.assertEqual(12, self.evaluate_text('Quadruple 3.', scope))
+        self.assertEqual(2, self.evaluate_text(
+            'Second of Range from 1 to 5. .', scope))
+        self.assertEqual('10', str(self.evaluate_text('Ten.', scope)))
+
+    def test_bodies_load_on_use(self):
+        library = find_library(string_to_signature('List tools.'),
+                               [self.directory.name])
+        scope = Scope(create_built_in_scope())
+        lazy = scope.add_lazy_definitions(library)
+        self.assertEqual(0, lazy.loads)
+        self.assertEqual(4, self.evaluate_text('Double 2.', scope))
+        self.assertEqual(6, self.evaluate_text('Double 3.', scope))
+        self.assertEqual(1, lazy.loads)
+
+    def test_reopen_changed(self):
+        name = string_to_signature('List tools.')
+        library = find_library(name, [self.directory.name])
+        self.assertIs(library, find_library(name, [self.directory.name]))
+        with open('tests/list-tools.ls') as file:
+            source = file.read()
+        changed = os.path.join(self.directory.name, 'changed.ls')
+        with open(changed, 'w') as file:
+            file.write(source + '\nDefine Twelve. to be 12.\n')
+        compile_library(changed, self.file_name)
+        new_library = find_library(name, [self.directory.name])
+        self.assertIsNot(library, new_library)
+        self.assertEqual(5, len(new_library.symbols))
+        with self.assertRaises(LibraryError):
+            library.load(0)
+
+    def test_parallel_loads_on_use(self):
+        library = find_library(string_to_signature('List tools.'),
+                               [self.directory.name])
+        scope = Scope(create_built_in_scope(jobs=2))
+        lazy = scope.add_lazy_definitions(ImportedLibrary(library, scope))
+        self.assertEqual([2, 4, 6, 8], self.evaluate_text(
+            'Parallel map D X. . over Range from 1 to 4. to be Double X. .',
+            scope).to_under_list())
+        self.assertEqual(1, lazy.loads)
+
+    def test_load_pickles(self):
+        library = Library(self.file_name)
+        definition = library.load(0)
+        copy = pickle.loads(pickle.dumps(definition))
+        self.assertEqual(definition.name, copy.name)
+        self.assertEqual(1, len(copy.code.params))
+
+    def test_errors(self):
+        with self.assertRaises(LibraryError):
+            find_library(string_to_signature('Missing.'),
+                         [self.directory.name])
+        with self.assertRaises(LibraryError):
+            compile_library('tests/one-two-three.ls',
+                            os.path.join(self.directory.name, 'bad.lsl'))
+        with self.assertRaises(LibraryError):
+            Library('tests/list-tools.ls')
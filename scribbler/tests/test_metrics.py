@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Tests for the hot path counters."""
+
+
+from io import (
+    StringIO,
+    )
+from unittest import TestCase
+
+from code import (
+    create_built_in_scope,
+    evaluate,
+    )
+from metrics import (
+    DEFINITIONS_SCANNED,
+    MATCHER_STEPS,
+    Metrics,
+    MetricsReport,
+    NODES_VISITED,
+    PRIMITIVE_LOOKUPS,
+    SCOPES_BUILT,
+    TOKENS,
+    )
+from parse import (
+    string_to_signature,
+    )
+from repl import (
+    repl_core,
+    )
+from tokenization import (
+    text_token_stream,
+    )
+
+
+class TestMetrics(TestCase):
+
+    def test_disabled(self):
+        self.assertIsNone(Metrics.active)
+        metrics = Metrics()
+        list(text_token_stream('Hello world.'))
+        self.assertEqual(0, metrics.counts[TOKENS])
+        self.assertEqual('Metrics are disabled.', str(MetricsReport()))
+
+    def test_count_tokens(self):
+        with Metrics() as metrics:
+            list(text_token_stream('Hello world.'))
+        self.assertEqual(3, metrics.counts[TOKENS])
+        metrics.reset()
+        self.assertEqual(0, metrics.snapshot()[TOKENS])
+
+    def test_count_repl(self):
+        with Metrics() as metrics:
+            repl_core('tests/one-two-three.ls', StringIO())
+        counts = metrics.snapshot()
+        # Includes the tokens of the built in signatures.
+        self.assertLess(40, counts[TOKENS])
+        self.assertEqual(3, counts[SCOPES_BUILT])
+        self.assertLess(0, counts[MATCHER_STEPS])
+        self.assertLessEqual(counts[MATCHER_STEPS], counts[NODES_VISITED])
+        self.assertLess(0, counts[DEFINITIONS_SCANNED])
+        self.assertLess(0, counts[PRIMITIVE_LOOKUPS])
+
+    def test_show_metrics(self):
+        scope = create_built_in_scope()
+        show = string_to_signature('Show metrics.')
+        with Metrics():
+            list(text_token_stream('Hello world.'))
+            result = evaluate(show, scope)
+            self.assertIn(TOKENS + ': 3\n', str(result))
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Tests for evaluating paragraphs in parallel."""
+
+
+from io import (
+    StringIO,
+    )
+from unittest import TestCase
+
+from parallel import (
+    ParallelRunner,
+    )
+from repl import (
+    repl_core,
+    )
+from tokenization import (
+    file_token_stream,
+    text_token_stream,
+    )
+
+
+class TestParallelRunner(TestCase):
+
+    def run_file(self, file_name, error_limit=None):
+        output = StringIO()
+        errors = StringIO()
+        skipped = ParallelRunner(2).run(file_token_stream(file_name),
+                                        output, error_limit, errors)
+        return (output.getvalue(), [number for (number, _) in skipped])
+
+    def sequential(self, file_name):
+        output = StringIO()
+        skipped = repl_core(file_name, output, None, StringIO())
+        return (output.getvalue(), [number for (number, _) in skipped])
+
+    def test_matches_sequential(self):
+        for file_name in ['tests/one-two-three.ls',
+                          'tests/bad-paragraphs.ls']:
+            self.assertEqual(self.sequential(file_name),
+                             self.run_file(file_name))
+
+    def test_error_limit(self):
+        with self.assertRaises(Exception):
+            self.run_file('tests/bad-paragraphs.ls', 1)
+
+    def test_runs_keep_definitions(self):
+        runner = ParallelRunner(2)
+        output = StringIO()
+        runner.run(text_token_stream(
+            'Define Double Number. . to be Add Number. to Number.\n'),
+            output)
+        runner.run(text_token_stream('Double 4.\n'), output)
+        self.assertEqual('8\n', output.getvalue())
@@ -9,6 +9,7 @@ from unittest.mock import (
     )
 
 from parse import (
+    ParseError,
     Parser,
     Sentence,
     string_to_signature,
@@ -18,9 +19,14 @@ from scope import (
     Definition,
     Scope,
     )
+from sentence import (
+    SentenceTable,
+    )
 from tokenization import (
     FirstToken,
     PeriodToken,
+    lines_token_stream,
+    text_token_stream,
     Token,
     tokenify_list,
     WordToken,
@@ -80,7 +86,8 @@ class TestParser(TestCase):
         scope.add_definition(Definition(
             string_to_signature('Something with Sub sentence. to parse.'), 1))
         scope.add_definition(Definition(
-            string_to_signature('Define New thing. to be a new type.'), 2))
+            string_to_signature('Define New thing. to be a new type.'), 2,
+            binding=True))
         return scope
 
     def test_parse_expression(self):
@@ -99,13 +106,13 @@ class TestParser(TestCase):
         self.assertEqual(exp,
             Sentence(tokens[0:2] + [Sentence(tokens[2])] + tokens[3:]))
 
-    def test_parse_expression_dispatch_to_definition(self):
+    def test_parse_expression_binding(self):
+        # Sig sentence. is not defined, it is read as a signature.
         scope = self.make_test_scope()
         parser = fake_parser(tokenify_list(['Define', 'Sig', 'sentence', '.',
             'to', 'be', 'a', 'new', 'type', '.']))
-        with patch.object(parser, 'parse_definition') as mock_parse_def:
-             parser.parse_expression(scope)
-        mock_parse_def.assert_called_once_with(scope)
+        self.assertEqual(parser.parse_expression(scope),
+            string_to_signature('Define Sig sentence. to be a new type.'))
 
     def test_parse_definition(self):
         scope = self.make_test_scope()
@@ -115,6 +122,35 @@ class TestParser(TestCase):
         self.assertEqual(dfn,
             string_to_signature('Define Sig sentence. to be a new type.'))
 
+    def test_parse_expression_shares_sentences(self):
+        scope = self.make_test_scope()
+        table = SentenceTable()
+        parser = Parser(text_token_stream(
+            'Something with Unit. to parse. Something with Unit. to parse.'),
+            sentence_table=table)
+        (first, second) = parser.iter_paragraph(scope)
+        self.assertIs(first, second)
+        self.assertIs(first[2], table.intern(string_to_signature('Unit.')))
+        self.assertEqual(2, len(table))
+
+    def test_iter_paragraph_recovers(self):
+        scope = self.make_test_scope()
+        parser = Parser(lines_token_stream(
+            ['Unit.\n', '\n', 'Something with\n', 'Nothing.\n', '\n',
+             'Unit.\n']), error_limit=None)
+        paragraphs = list(parser.iter_paragraph(scope))
+        self.assertEqual(2, len(paragraphs))
+        self.assertEqual([2], [number for (number, _) in parser.errors])
+
+    def test_iter_paragraph_error_limit(self):
+        scope = self.make_test_scope()
+        parser = Parser(lines_token_stream(
+            ['Bad.\n', '\n', 'Unit.\n', '\n', 'Worse.\n']),
+            error_limit=1)
+        with self.assertRaises(ParseError):
+            list(parser.iter_paragraph(scope))
+        self.assertEqual(1, len(parser.errors))
+
 
 class TestTokenStream(TestCase):
 
@@ -136,17 +172,45 @@ class TestTokenStream(TestCase):
         self.assertTrue(ts.is_empty())
         self.assertFalse(ts.not_empty())
 
-    def test_push_back(self):
+    def test_peek(self):
+        ts = TokenStream(FakeStream(
+            [FirstToken('Test'), WordToken('sentence'), PeriodToken()]))
+        self.assertEqual(PeriodToken(), ts.peek(2))
+        self.assertIsNone(ts.peek(3))
+        self.assertEqual(FirstToken('Test'), ts.peek())
+        ts.advance()
+        self.assertEqual(WordToken('sentence'), next(ts))
+
+    def test_advance_past_end(self):
         ts = TokenStream(FakeStream([PeriodToken()]))
-        ts.push_back(FirstToken('Test'))
-        self.assertEqual(FirstToken('Test'), next(ts))
-        self.assertEqual(PeriodToken(), next(ts))
+        with self.assertRaises(ValueError):
+            ts.advance(2)
 
-    def test_push_back_overload(self):
-        ts = TokenStream(FakeStream([]))
-        ts.push_back(PeriodToken())
+    def test_mark_reset(self):
+        ts = TokenStream(FakeStream(
+            [FirstToken('Test'), WordToken('sentence'), PeriodToken()]))
+        next(ts)
+        mark = ts.mark()
+        next(ts)
+        next(ts)
+        self.assertTrue(ts.is_empty())
+        ts.reset(mark)
+        self.assertEqual(WordToken('sentence'), next(ts))
+
+    def test_release(self):
+        ts = TokenStream(FakeStream(
+            [FirstToken('Test'), WordToken('sentence'), PeriodToken()]))
+        old_mark = ts.mark()
+        next(ts)
+        mark = ts.mark()
+        ts.peek()
+        ts.release()
+        self.assertEqual(1, len(ts._buffer))
         with self.assertRaises(ValueError):
-            ts.push_back(PeriodToken())
+            ts.reset(old_mark)
+        next(ts)
+        ts.reset(mark)
+        self.assertEqual(WordToken('sentence'), next(ts))
 
 
 class TestStringToSignature(TestCase):
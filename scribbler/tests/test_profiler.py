@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Tests for the Little Scribe profiler."""
+
+
+from io import (
+    StringIO,
+    )
+from unittest import TestCase
+
+from parse import (
+    string_to_signature,
+    )
+from profiler import (
+    PARSE,
+    Profiler,
+    signature_text,
+    TOKENIZE,
+    )
+from repl import (
+    repl_core,
+    )
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSignatureText(TestCase):
+
+    def test_signature_text(self):
+        self.assertEqual('Define Head. to be Body. .', signature_text(
+            string_to_signature('Define Head. to be Body. .')))
+
+
+class TestProfiler(TestCase):
+
+    def test_inclusive_exclusive(self):
+        clock = FakeClock()
+        profiler = Profiler(clock)
+        profiler.enter('outer')
+        clock.now = 1.0
+        profiler.enter('inner')
+        clock.now = 3.0
+        profiler.exit()
+        clock.now = 4.0
+        profiler.exit()
+        self.assertEqual([('outer', 1, 4.0, 2.0), ('inner', 1, 2.0, 2.0)],
+                         profiler.results())
+        collapsed = StringIO()
+        profiler.write_collapsed(collapsed)
+        self.assertEqual('outer 2000000\nouter;inner 2000000\n',
+                         collapsed.getvalue())
+
+    def test_recursive_inclusive(self):
+        clock = FakeClock()
+        profiler = Profiler(clock)
+        profiler.enter('self')
+        profiler.enter('self')
+        clock.now = 1.0
+        profiler.exit()
+        profiler.exit()
+        self.assertEqual([('self', 2, 1.0, 1.0)], profiler.results())
+
+    def test_enable(self):
+        profiler = Profiler()
+        with profiler:
+            self.assertIs(profiler, Profiler.active)
+        self.assertIsNone(Profiler.active)
+
+    def test_profile_repl(self):
+        profiler = Profiler()
+        repl_core('tests/one-two-three.ls', StringIO(), profiler=profiler)
+        calls = {name: calls for (name, calls, _, _) in profiler.results()}
+        self.assertEqual(6, calls['Add Left hand side. to Right hand side. .'])
+        self.assertEqual(3, calls['Double Number. .'])
+        self.assertEqual(2, calls['Define Head. to be Body. .'])
+        self.assertIn(PARSE, calls)
+        self.assertIn(TOKENIZE, calls)
+        self.assertIsNone(Profiler.active)
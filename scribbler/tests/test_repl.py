@@ -6,8 +6,14 @@ from unittest import TestCase
 from io import (
     StringIO
     )
+import os
+import subprocess
+import sys
+import tempfile
+
 from repl import (
     repl_core,
+    repl_file,
     )
 
 
@@ -17,3 +23,28 @@ class TestRepl(TestCase):
         output = StringIO()
         repl_core('tests/one-two-three.ls', output)
         self.assertEqual('1\n2\n3\n4\n5\n6\n', output.getvalue())
+
+    def test_ignore_errors(self):
+        output = StringIO()
+        errors = StringIO()
+        skipped = repl_core('tests/bad-paragraphs.ls', output,
+                            error_limit=None, error_file=errors)
+        self.assertEqual('1\n2\n3\n', output.getvalue())
+        self.assertEqual([2, 5], [number for (number, _) in skipped])
+        self.assertEqual(2, len(errors.getvalue().splitlines()))
+
+    def test_repl_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output_name = os.path.join(directory, 'output.txt')
+            repl_file('tests/one-two-three.ls', output_name)
+            with open(output_name) as output_file:
+                self.assertEqual('1\n2\n3\n4\n5\n6\n', output_file.read())
+
+    def test_start_up_imports(self):
+        # The pools, type checker and result cache load when first used.
+        modules = ['concurrent.futures', 'result_cache', 'typecheck']
+        loaded = subprocess.run(
+            [sys.executable, '-c', 'import sys, repl; print([name for '
+             'name in {!r} if name in sys.modules])'.format(modules)],
+            capture_output=True, text=True, check=True).stdout
+        self.assertEqual('[]', loaded.strip())
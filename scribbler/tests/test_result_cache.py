@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Tests for the result cache of pure paragraphs."""
+
+
+from io import (
+    StringIO,
+    )
+import os
+import tempfile
+from unittest import TestCase
+
+from arithmetic import (
+    arithmetic_definitions,
+    )
+from code import (
+    create_built_in_scope,
+    evaluate,
+    )
+from lazy import (
+    lazy_evaluation,
+    )
+from parallel import (
+    ParallelRunner,
+    )
+from parse import (
+    Parser,
+    string_to_signature,
+    )
+from repl import (
+    run_tokens,
+    )
+from result_cache import (
+    definition_hash,
+    paragraph_key,
+    ResultCache,
+    )
+from scope import (
+    Definition,
+    Scope,
+    )
+from tokenization import (
+    text_token_stream,
+    )
+
+
+class Unwritable(str):
+
+    def encode(self, encoding):
+        return None
+
+
+DOUBLE = 'Define Double Number. . to be Add Number. to Number.\n'
+
+
+class TestParagraphKey(TestCase):
+
+    def make_scope(self, text):
+        scope = Scope(create_built_in_scope())
+        evaluate(self.parse(text, scope), scope).do(scope)
+        return scope
+
+    def parse(self, text, scope):
+        return Parser(text_token_stream(text)).parse_expression(scope)
+
+    def key(self, text, scope):
+        return paragraph_key(self.parse(text, scope), scope)
+
+    def test_same_definitions(self):
+        self.assertEqual(self.key('Double 2.', self.make_scope(DOUBLE)),
+                         self.key('Double 2.', self.make_scope(DOUBLE)))
+
+    def test_changed_definitions(self):
+        triple = 'Define Double Number. . to be Multiply Number. by 3.\n'
+        self.assertNotEqual(
+            self.key('Double 2.', self.make_scope(DOUBLE)),
+            self.key('Double 2.', self.make_scope(triple)))
+
+    def test_impure(self):
+        scope = self.make_scope(DOUBLE)
+        self.assertIsNone(self.key('Define Two. to be 2.', scope))
+        self.assertIsNone(self.key('Show metrics.', scope))
+        self.assertIsNotNone(self.key('Double 2.', scope))
+
+    def test_evaluation_mode(self):
+        scope = self.make_scope(DOUBLE)
+        with lazy_evaluation():
+            lazy_key = self.key('Double 2.', scope)
+        self.assertNotEqual(lazy_key, self.key('Double 2.', scope))
+
+
+class TestDefinitionHash(TestCase):
+
+    def test_built_in_contents(self):
+        name = string_to_signature('Next Value. .')
+        self.assertNotEqual(
+            definition_hash(Definition(name, lambda s, x: x + 1)),
+            definition_hash(Definition(name, lambda s, x: x + 2)))
+        self.assertEqual(
+            definition_hash(Definition(name, lambda s, x: x + 1)),
+            definition_hash(Definition(name, lambda s, x: x + 1)))
+
+    def test_integer_width(self):
+        (narrow, wide, same) = [
+            [definition_hash(definition)
+             for definition in arithmetic_definitions(width)]
+            for width in (8, 16, 8)]
+        self.assertNotEqual(narrow[0], wide[0])
+        self.assertEqual(narrow, same)
+
+
+class TestResultCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_put(self):
+        cache = ResultCache(self.directory.name)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', '12')
+        self.assertEqual('12', ResultCache(self.directory.name).get('a'))
+        self.assertEqual(0, cache.hits)
+
+    def test_overwrite_size(self):
+        cache = ResultCache(self.directory.name, max_bytes=4)
+        for _ in range(3):
+            cache.put('a', '12')
+        cache.put('b', '34')
+        self.assertEqual(['12', '34'], [cache.get('a'), cache.get('b')])
+
+    def test_failed_write(self):
+        cache = ResultCache(self.directory.name)
+        with self.assertRaises(TypeError):
+            cache.put('a', Unwritable())
+        self.assertEqual([], os.listdir(self.directory.name))
+
+    def test_evict(self):
+        cache = ResultCache(self.directory.name, max_bytes=4)
+        cache.put('a', '12')
+        os.utime(os.path.join(self.directory.name, 'a.result'), (0, 0))
+        cache.put('b', '34')
+        cache.put('c', '56')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(['34', '56'], [cache.get('b'), cache.get('c')])
+
+    def run_text(self, text, jobs=1, lazy=False):
+        cache = ResultCache(self.directory.name)
+        output = StringIO()
+        if 1 < jobs:
+            ParallelRunner(jobs, lazy=lazy, result_cache=cache).run(
+                text_token_stream(text), output)
+        else:
+            with lazy_evaluation(lazy):
+                run_tokens(text_token_stream(text),
+                           Scope(create_built_in_scope()), output,
+                           result_cache=cache)
+        return (output.getvalue(), cache.hits)
+
+    def test_across_runs(self):
+        text = DOUBLE + '\nDouble 2.\n\nDouble 3.\n'
+        self.assertEqual(('4\n6\n', 0), self.run_text(text))
+        self.assertEqual(('4\n6\n', 2), self.run_text(text))
+        self.assertEqual(('4\n6\n', 2), self.run_text(text, jobs=2))
+
+    def test_parallel_stores(self):
+        text = DOUBLE + '\nDouble 2.\n\nDouble 3.\n'
+        self.assertEqual(('4\n6\n', 0), self.run_text(text, jobs=2))
+        self.assertEqual(('4\n6\n', 2), self.run_text(text))
+
+    def test_lazy_result_not_used_eagerly(self):
+        text = 'If Is 1 less than 2. then 1 else Head of Empty list. .\n'
+        for jobs in (1, 2):
+            self.assertEqual('1\n', self.run_text(text, jobs, True)[0])
+            with self.assertRaises(AttributeError):
+                self.run_text(text, jobs)
+
+    def test_changed_definition(self):
+        self.run_text(DOUBLE + '\nDouble 2.\n')
+        triple = 'Define Double Number. . to be Multiply Number. by 3.\n'
+        self.assertEqual(('6\n', 0), self.run_text(triple + '\nDouble 2.\n'))
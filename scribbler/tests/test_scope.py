@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 
 from contextlib import contextmanager
+import gc
+import pickle
 from unittest import TestCase
+import weakref
 
+from metrics import (
+    MATCH_CACHE_HITS,
+    Metrics,
+    )
 from parse import (
     Sentence,
     string_to_signature,
@@ -50,6 +57,29 @@ class TestScope(TestCase):
         with self.assertRaises(NoDefinitionError):
             inner_scope.match_sentence(string_to_signature('Sentences.'))
 
+    def test_definition_layers(self):
+        outer = Scope()
+        outer.add_definition(Definition(string_to_signature('Outer.'), 1))
+        middle = Scope(outer)
+        inner = Scope(middle)
+        inner.add_definition(Definition(string_to_signature('Inner.'), 2))
+        layers = inner.definition_layers(outer)
+        self.assertEqual([[], [2]], [[definition.code for definition in layer]
+                                     for layer in layers])
+        self.assertEqual(3, len(inner.definition_layers()))
+        only = [inner.match_sentence(string_to_signature('Outer.'))]
+        self.assertEqual([[1], [], []], [
+            [definition.code for definition in layer]
+            for layer in inner.definition_layers(only=only)])
+
+    def test_definition_pickles_without_scope(self):
+        scope = Scope()
+        definition = Definition(string_to_signature('Value.'), 3)
+        scope.add_definition(definition)
+        copy = pickle.loads(pickle.dumps(definition))
+        self.assertEqual(3, copy.code)
+        self.assertFalse(hasattr(copy, '_scope'))
+
 
 def make_test_scopes():
     scope0 = Scope(None)
@@ -98,3 +128,269 @@ class TestScopeMatcher(TestCase):
         self.assertTrue(matcher.next(tokenify('Fake')))
         self.assertFalse(matcher.next(tokenify('token')))
         self.assertTrue(matcher.next(tokenify('sentence')))
+
+
+def make_compiled_scopes():
+    scope0 = Scope(None, compiled=True)
+    scope0.add_definition(Definition(
+        string_to_signature('Fake sentence for testing.'), 0))
+    scope0.add_definition(Definition(
+        string_to_signature('Beginning Middle. end.'), 1))
+    return [scope0, Scope(scope0)]
+
+
+class TestScopeCompiledMatcher(TestCase):
+
+    def test_compiled_inherited(self):
+        scopes = make_compiled_scopes()
+        self.assertIsInstance(scopes[1].new_matcher(), Scope.CompiledMatcher)
+        self.assertIsInstance(Scope().new_matcher(), Scope.Matcher)
+
+    def test_compiled_match_simple(self):
+        matcher = make_compiled_scopes()[0].new_matcher()
+        self.assertTrue(matcher.next(tokenify('Fake')))
+        self.assertTrue(matcher.next(tokenify('sentence')))
+        self.assertIsNone(matcher.has_end())
+        self.assertFalse(matcher.next(tokenify('token')))
+        self.assertTrue(matcher.next(tokenify('for')))
+        self.assertTrue(matcher.next(tokenify('testing')))
+        self.assertEqual(matcher.has_end().code, 0)
+        self.assertFalse(matcher.next())
+
+    def test_compiled_match_parent(self):
+        matcher = make_compiled_scopes()[1].new_matcher()
+        self.assertTrue(matcher.next(tokenify('Beginning')))
+        self.assertTrue(matcher.next())
+        self.assertTrue(matcher.next(tokenify('end')))
+        self.assertEqual(matcher.has_end().code, 1)
+
+    def test_compiled_rebuilt_on_change(self):
+        (outer, inner) = make_compiled_scopes()
+        inner.match_sentence(string_to_signature('Fake sentence for testing.'))
+        with self.assertRaises(NoDefinitionError):
+            inner.match_sentence(string_to_signature('Late.'))
+        outer.add_definition(Definition(string_to_signature('Late.'), 2))
+        self.assertEqual(
+            inner.match_sentence(string_to_signature('Late.')).code, 2)
+
+    def test_automaton_shares_states(self):
+        scope = make_compiled_scopes()[1]
+        automaton = scope._get_automaton(scope._build_scope_list())
+        first = automaton.token_step(0, 'Fake')
+        self.assertEqual(first, automaton.token_step(0, 'Fake'))
+        self.assertEqual(-1, automaton.token_step(0, 'Missing'))
+        self.assertEqual(-1, automaton.sub_step(first))
+
+
+class FakeSource:
+
+    def __init__(self, *texts):
+        self.texts = texts
+        self.loaded = []
+
+    def signatures(self):
+        return [(string_to_signature(text), key)
+                for (key, text) in enumerate(self.texts)]
+
+    def load(self, key):
+        self.loaded.append(key)
+        return Definition(string_to_signature(self.texts[key]), key)
+
+
+class TestScopeLazyDefinitions(TestCase):
+
+    def test_loaded_on_match(self):
+        scope = Scope()
+        source = FakeSource('First.', 'Second Value. .')
+        lazy = scope.add_lazy_definitions(source)
+        self.assertEqual([], source.loaded)
+        definition = scope.match_sentence(
+            string_to_signature('Second Other. .'))
+        self.assertEqual(1, definition.code)
+        self.assertIs(definition, scope.match_sentence(
+            string_to_signature('Second Value. .')))
+        self.assertEqual([1], source.loaded)
+        self.assertEqual(1, len(lazy))
+
+    def test_evicted(self):
+        scope = Scope()
+        source = FakeSource('First.', 'Second.')
+        lazy = scope.add_lazy_definitions(source, cache_size=1)
+        for text in ['First.', 'Second.', 'First.']:
+            scope.match_sentence(string_to_signature(text))
+        self.assertEqual([0, 1, 0], source.loaded)
+        self.assertEqual(3, lazy.loads)
+        self.assertEqual(1, len(lazy))
+
+    def test_conflicts(self):
+        scope = Scope()
+        scope.add_definition(Definition(string_to_signature('First.'), 0))
+        with self.assertRaises(ValueError):
+            scope.add_lazy_definitions(FakeSource('First.'))
+        scope.add_lazy_definitions(FakeSource('Second.'))
+        with self.assertRaises(ValueError):
+            Scope(scope).add_definition(
+                Definition(string_to_signature('Second.'), 1))
+
+    def test_compiled_match(self):
+        scope = Scope(None, compiled=True)
+        source = FakeSource('First.', 'Second.')
+        scope.add_lazy_definitions(source)
+        self.assertEqual(1, Scope(scope).match_sentence(
+            string_to_signature('Second.')).code)
+        self.assertEqual([1], source.loaded)
+
+    def test_definition_layers_loads(self):
+        scope = Scope()
+        scope.add_lazy_definitions(FakeSource('First.', 'Second.'))
+        self.assertEqual([[0, 1]], [[definition.code for definition in layer]
+                                    for layer in scope.definition_layers()])
+
+    def test_definition_layers_only(self):
+        scope = Scope()
+        source = FakeSource('First.', 'Second.')
+        scope.add_lazy_definitions(source)
+        only = [scope.match_sentence(string_to_signature('Second.'))]
+        self.assertEqual([[1]], [[definition.code for definition in layer]
+                                 for layer in scope.definition_layers(
+                                     only=only)])
+        self.assertEqual([1], source.loaded)
+
+
+class TestScopeMatchCache(TestCase):
+
+    def test_hit(self):
+        scope = Scope()
+        definition = Definition(string_to_signature('Value Item. .'), 0)
+        scope.add_definition(definition)
+        sentence = string_to_signature('Value Other. .')
+        with Metrics() as metrics:
+            self.assertIs(definition, scope.match_sentence(sentence))
+            self.assertIs(definition, Scope(scope).match_sentence(sentence))
+        self.assertEqual(1, metrics.counts[MATCH_CACHE_HITS])
+
+    def test_guards(self):
+        (first, second) = (Scope(), Scope())
+        for (code, scope) in enumerate((first, second)):
+            scope.add_definition(Definition(string_to_signature('Value.'),
+                                            code))
+        sentence = string_to_signature('Value.')
+        with Metrics() as metrics:
+            self.assertEqual(0, first.match_sentence(sentence).code)
+            # Not visible from here.
+            self.assertEqual(1, second.match_sentence(sentence).code)
+            second.add_definition(Definition(string_to_signature('Late.'), 2))
+            # The scope it was found in has changed.
+            self.assertEqual(1, second.match_sentence(sentence).code)
+        self.assertEqual(0, metrics.counts[MATCH_CACHE_HITS])
+
+    def test_does_not_keep_scope(self):
+        scope = Scope()
+        scope.add_definition(Definition(string_to_signature('Value.'), 0))
+        sentence = string_to_signature('Value.')
+        scope.match_sentence(sentence)
+        del scope
+        # Scopes and their Definitions refer to each other.
+        gc.collect()
+        (owner_ref, _, definition_ref) = sentence.match_cache
+        self.assertIsNone(owner_ref())
+        self.assertIsNone(definition_ref())
+
+    def test_not_pickled(self):
+        scope = Scope()
+        scope.add_definition(Definition(string_to_signature('Value.'), 0))
+        sentence = string_to_signature('Value.')
+        scope.match_sentence(sentence)
+        self.assertIsNotNone(sentence.match_cache)
+        self.assertIsNone(pickle.loads(pickle.dumps(sentence)).match_cache)
+
+
+class TestScopeVersion(TestCase):
+
+    def add(self, scope, text):
+        scope.add_definition(Definition(string_to_signature(text), None))
+
+    def test_changes_reach_children(self):
+        outer = Scope()
+        inner = Scope(outer)
+        version = inner.version()
+        self.assertFalse(inner.changed_since(version))
+        self.add(outer, 'Outer.')
+        self.assertTrue(inner.changed_since(version))
+        version = inner.version()
+        self.add(Scope(inner), 'Nested.')
+        self.assertFalse(inner.changed_since(version))
+        self.add(inner, 'Inner.')
+        self.assertLess(outer.version(), inner.version())
+
+    def test_subscribe(self):
+        outer = Scope()
+        inner = Scope(outer)
+        changes = []
+        inner.subscribe(changes.append)
+        self.add(inner, 'Inner.')
+        self.add(outer, 'Outer.')
+        outer.invalidate()
+        self.add(Scope(inner), 'Nested.')
+        self.assertEqual([inner, outer, outer], changes)
+        inner.unsubscribe(changes.append)
+        inner.unsubscribe(changes.append)
+        self.add(outer, 'Late.')
+        self.assertEqual(3, len(changes))
+
+    def test_subscribe_keeps_callback_in_scope(self):
+        outer = Scope()
+        inner = Scope(outer)
+        changes = []
+        inner.subscribe(changes.append)
+        self.assertIsNone(outer._subscribers)
+        inner_ref = weakref.ref(inner)
+        del inner
+        gc.collect()
+        self.assertIsNone(inner_ref())
+        self.add(outer, 'Outer.')
+        self.assertEqual([], changes)
+
+
+class TestScopeCandidates(TestCase):
+
+    def make_shadowed(self, compiled):
+        # The outer definition can not see the inner one, so both are
+        # allowed and the inner one shadows it.
+        outer = Scope(None, compiled=compiled)
+        inner = Scope(outer)
+        inner.add_definition(Definition(string_to_signature('Value.'), 1))
+        outer.add_definition(Definition(string_to_signature('Value.'), 0))
+        return inner
+
+    def test_innermost_wins(self):
+        for compiled in (False, True):
+            scope = self.make_shadowed(compiled)
+            sentence = string_to_signature('Value.')
+            self.assertEqual(1, scope.match_sentence(sentence).code)
+            self.assertEqual([1, 0], [definition.code for definition in
+                                      scope.match_candidates(sentence)])
+
+    def test_shadowed_match_cache(self):
+        for compiled in (False, True):
+            inner = self.make_shadowed(compiled)
+            sentence = string_to_signature('Value.')
+            self.assertEqual(0, inner._parent.match_sentence(sentence).code)
+            self.assertEqual(1, inner.match_sentence(sentence).code)
+            self.assertEqual(0, inner._parent.match_sentence(sentence).code)
+
+    def test_no_candidates(self):
+        scope = make_test_scopes()[1]
+        self.assertEqual([], scope.match_candidates(
+            string_to_signature('Fake sentence.')))
+        # Skipping an unmatched token is not a match.
+        with self.assertRaises(NoDefinitionError):
+            scope.match_sentence(
+                string_to_signature('Fake token sentence for testing.'))
+
+    def test_failed_next_stays(self):
+        for scope in (make_test_scopes()[1], make_compiled_scopes()[1]):
+            matcher = scope.new_matcher()
+            self.assertTrue(matcher.next(tokenify('Fake')))
+            self.assertFalse(matcher.next(tokenify('for')))
+            self.assertTrue(matcher.next(tokenify('sentence')))
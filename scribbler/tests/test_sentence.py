@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 
 
+from parse import (
+    string_to_signature,
+    )
 from sentence import (
+    freeze_sentence,
     Sentence,
+    SentenceTable,
+    thaw_sentence,
     )
 from tokenization import (
     FirstToken,
@@ -31,3 +37,44 @@ class TestSentence(TestCase):
         self.assertTrue(super_has_period.ends_with_dot())
         super_no_period = Sentence([FirstToken('Run'), no_period])
         self.assertFalse(super_no_period.ends_with_dot())
+
+    def test_hash(self):
+        left = Sentence([FirstToken('Run'), Sentence([FirstToken('Short'),
+                         WordToken('sentence'), PeriodToken()])])
+        right = Sentence([FirstToken('Run'), Sentence([FirstToken('Short'),
+                          WordToken('sentence'), PeriodToken()])])
+        self.assertEqual(hash(left), hash(right))
+        self.assertEqual('value', {left: 'value'}[right])
+        self.assertIsNotNone(left._hash)
+
+    def test_hash_reset_on_append(self):
+        sentence = Sentence([FirstToken('Short'), WordToken('sentence')])
+        hash(sentence)
+        sentence.append(PeriodToken())
+        self.assertIsNone(sentence._hash)
+        self.assertNotEqual(sentence, Sentence([FirstToken('Short'),
+                                                WordToken('sentence')]))
+
+
+class TestSentenceTable(TestCase):
+
+    def test_intern(self):
+        table = SentenceTable()
+        first = Sentence([FirstToken('Unit'), PeriodToken()])
+        second = Sentence([FirstToken('Unit'), PeriodToken()])
+        self.assertIs(first, table.intern(first))
+        self.assertIs(first, table.intern(second))
+        self.assertEqual(1, len(table))
+        self.assertIn(second, table)
+
+
+class TestFrozenSentence(TestCase):
+
+    def test_freeze(self):
+        self.assertEqual(('Define', ('Head', '.'), 'to', 'be', ('Body', '.'),
+                          '.'),
+            freeze_sentence(string_to_signature('Define Head. to be Body. .')))
+
+    def test_thaw(self):
+        signature = string_to_signature('Is This value. empty.')
+        self.assertEqual(signature, thaw_sentence(freeze_sentence(signature)))
@@ -11,6 +11,7 @@ from tokenization import (
     text_token_stream,
     make_token,
     IntegerToken,
+    lines_token_stream,
     PeriodToken,
     Token,
     WordToken,
@@ -85,3 +86,9 @@ class TestSimpleStreams(TestCase):
             WordToken('is'), WordToken('a'),
             WordToken('test'), PeriodToken('.'),
             ], tokens)
+
+    def test_lines_token_stream_paragraphs(self):
+        tokens = list(lines_token_stream(
+            ['One.\n', 'Two\n', '\n', '  \n', 'three. Four.\n']))
+        self.assertEqual([True, False, False, True, False, False, False],
+                         [token.starts_paragraph for token in tokens])
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Tests for the type checking pass."""
+
+
+from io import (
+    StringIO,
+    )
+from unittest import TestCase
+
+from base_types import (
+    AnythingType,
+    BooleanType,
+    IntegerType,
+    ListType,
+    )
+from code import (
+    create_built_in_scope,
+    evaluate,
+    )
+from parse import (
+    Parser,
+    )
+from repl import (
+    repl_core,
+    )
+from scope import (
+    Scope,
+    )
+from tokenization import (
+    text_token_stream,
+    )
+from typecheck import (
+    check_paragraph,
+    check_sentence,
+    INFER,
+    STRICT,
+    TypeCheckError,
+    )
+
+
+def parse_text(text, scope):
+    return Parser(text_token_stream(text)).parse_expression(scope)
+
+
+class TestCheckSentence(TestCase):
+
+    def setUp(self):
+        self.scope = Scope(create_built_in_scope())
+
+    def test_integer_arithmetic(self):
+        sentence = parse_text('Add 1 to Multiply 2 by 3.', self.scope)
+        self.assertIsInstance(check_sentence(sentence, self.scope),
+                              IntegerType)
+        self.assertIsInstance(sentence[1].type, IntegerType)
+        self.assertIsInstance(sentence[3].type, IntegerType)
+
+    def test_comparison(self):
+        sentence = parse_text('Is 1 less than 2.', self.scope)
+        self.assertIsInstance(check_sentence(sentence, self.scope),
+                              BooleanType)
+
+    def test_lists(self):
+        sentence = parse_text('Tail of Put 1 onto Empty list. .', self.scope)
+        result = check_sentence(sentence, self.scope)
+        self.assertIsInstance(result, ListType)
+
+    def test_ill_typed(self):
+        sentence = parse_text('Add Empty list. to 1.', self.scope)
+        with self.assertRaises(TypeCheckError):
+            check_sentence(sentence, self.scope)
+        self.assertIsNone(sentence.type)
+        self.assertIsNone(check_paragraph(sentence, self.scope))
+        with self.assertRaises(TypeCheckError):
+            check_paragraph(sentence, self.scope, strict=True)
+
+    def test_user_function(self):
+        definition = parse_text(
+            'Define Double Number. . to be Add Number. to Number. .',
+            self.scope)
+        self.assertIsInstance(check_sentence(definition, self.scope),
+                              AnythingType)
+        evaluate(definition, self.scope).do(self.scope)
+        call = parse_text('Double 2.', self.scope)
+        self.assertIsInstance(check_sentence(call, self.scope), AnythingType)
+        self.assertEqual(4, evaluate(call, self.scope))
+
+
+class TestReplTypeCheck(TestCase):
+
+    def test_one_two_three(self):
+        for mode in [INFER, STRICT]:
+            output = StringIO()
+            repl_core('tests/one-two-three.ls', output, type_check=mode)
+            self.assertEqual('1\n2\n3\n4\n5\n6\n', output.getvalue())
+
+    def test_strict_rejects(self):
+        output = StringIO()
+        skipped = repl_core('tests/ill-typed.ls', output, error_limit=None,
+                            error_file=StringIO(), type_check=STRICT)
+        self.assertEqual('3\n', output.getvalue())
+        self.assertEqual([1], [number for (number, _) in skipped])
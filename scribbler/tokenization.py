@@ -9,11 +9,21 @@ import re
 import string
 import sys
 
+from metrics import (
+    Metrics,
+    TOKENS,
+    )
+
 
 class Token:
     """Repersents a 'word' of the language.
 
-    Tokens are leaf nodes in the parse tree."""
+    Tokens are leaf nodes in the parse tree.
+
+    :ivar starts_paragraph: True if the token is the first one after a blank
+        line (or the start of a file), which the parser may resync to."""
+
+    starts_paragraph = False
 
     def __init__(self, text):
         if not self.regex_match(text):
@@ -36,6 +46,9 @@ class Token:
     def __ne__(self, other):
         return not self == other
 
+    def __hash__(self):
+        return hash((type(self), self.text))
+
     def __str__(self):
         return self.text
 
@@ -153,25 +166,46 @@ def make_token(source_string):
 
 def text_token_stream(base_text):
     """Convert a single line into a stream of tokens."""
+    metrics = Metrics.active
     while base_text:
         (token, base_text) = make_token(base_text)
         if token:
+            if metrics is not None:
+                metrics.add(TOKENS)
             yield token
 
 
-def open_token_stream(file_like):
-    """Read from an already open stream."""
-    for line in file_like.readlines():
-        for token in text_token_stream(line):
+def lines_token_stream(lines):
+    """Convert an iterable of lines into a stream of tokens.
+
+    The first token after each run of blank lines is marked as starting a
+    paragraph."""
+    after_blank = True
+    for line in lines:
+        tokens = text_token_stream(line)
+        token = next(tokens, None)
+        if token is None:
+            after_blank = True
+            continue
+        if after_blank:
+            token.starts_paragraph = True
+            after_blank = False
+        yield token
+        for token in tokens:
             yield token
 
 
+def open_token_stream(file_like):
+    """Read from an already open stream, a line at a time."""
+    for token in lines_token_stream(file_like):
+        yield token
+
+
 def file_token_stream(file_name):
     """Convert a text file into a stream of tokens."""
     with open(file_name) as file:
-        for line in file.readlines():
-            for token in text_token_stream(line):
-                yield token
+        for token in lines_token_stream(file.readlines()):
+            yield token
 
 
 def tokenify(text):
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Static type checking of parsed paragraphs.
+
+Types come from the Definitions sentences match, see base_types. Checking
+is gradual: a value of AnythingType may be passed where any type is
+expected, so untyped user definitions never fail the check, but known
+types must agree.
+
+The type found for each Sentence is recorded as its type attribute. The
+evaluator takes a recorded type as a promise the Sentence is well typed
+and uses it to pick faster paths."""
+
+
+from base_types import (
+    AnythingType,
+    FunctionType,
+    IntegerType,
+    LittleScribeType,
+    )
+from scope import (
+    NoDefinitionError,
+    )
+from tokenization import (
+    IntegerToken,
+    )
+
+
+INFER = 'infer'
+STRICT = 'strict'
+
+
+class TypeCheckError(Exception):
+    """A Sentence is not well typed."""
+
+
+def is_compatible(expected, actual):
+    """Check if a value of type actual may be used where expected is."""
+    return isinstance(actual, AnythingType) or expected.is_super_of(actual)
+
+
+def check_sentence(sentence, scope):
+    """Find the type of a Sentence, recording it on the Sentence and on all
+    of its sub-sentences.
+
+    :raise TypeCheckError: If the Sentence is not well typed."""
+    if sentence.is_primitive():
+        if isinstance(sentence[0], IntegerToken):
+            result = IntegerType()
+        else:
+            result = AnythingType()
+    else:
+        try:
+            match = scope.match_sentence(sentence)
+        except NoDefinitionError as error:
+            raise TypeCheckError(error.args[0])
+        if match.binding:
+            subs = list(sentence.iter_sub())
+            inner_scope = scope.new_define_scope(subs[0])
+            for body in subs[1:]:
+                check_sentence(body, inner_scope)
+            # Definitions result in Actions, which are not typed yet, and
+            # the type of the other binding sentences depends on their
+            # bodies.
+            result = AnythingType()
+        else:
+            arg_types = [check_sentence(sub, scope)
+                         for sub in sentence.iter_sub()]
+            def_type = match.type
+            if isinstance(def_type, FunctionType):
+                if def_type.parameter_count != len(arg_types):
+                    raise TypeCheckError('Wrong number of arguments: ' +
+                                         str(sentence))
+                for (index, (expected, actual)) in enumerate(
+                        zip(def_type.parameter_types, arg_types)):
+                    if not is_compatible(expected, actual):
+                        raise TypeCheckError(
+                            'Argument {} has the wrong type: {}'.format(
+                                index + 1, sentence))
+                result = def_type.return_type
+            elif not arg_types and isinstance(def_type, LittleScribeType):
+                result = def_type
+            else:
+                result = AnythingType()
+    sentence.type = result
+    return result
+
+
+def check_paragraph(paragraph, scope, strict=False):
+    """Type check a paragraph before it is evaluated.
+
+    :param strict: If true a badly typed paragraph raises TypeCheckError,
+        otherwise it is left unchecked and evaluated without promises.
+    :return: The type of the paragraph, None if it was not well typed."""
+    try:
+        return check_sentence(paragraph, scope)
+    except TypeCheckError:
+        if strict:
+            raise
+        return None